@@ -1,147 +1,31 @@
 import streamlit as st
-import datetime
-import random
 import pandas as pd
-from chinese_calendar import is_workday, get_holidays
+from tripsync.workdays import check_year_support, get_horizon_dates
+from tripsync.engine import PersonSpec, ScheduleRequest, check
+from tripsync.export import MIME_TYPES, export_bytes
+from tripsync.holidays import data_dir, holiday_table
+from tripsync.jobs import CANCELLED, DONE, QUEUED, JobQueueFull, get_job_manager
+from tripsync.stats import SolverStats
 
 # ==========================================
-# 1. 核心算法逻辑
+# 1. 核心算法逻辑（统一由 tripsync.engine 提供）
 # ==========================================
-def get_prev_workday(date):
-    d = date - datetime.timedelta(days=1)
-    while not is_workday(d):
-        d -= datetime.timedelta(days=1)
-    return d
+def build_request(people_data, year, quarter, **options):
+    people = [PersonSpec(p['name'], p['count'], p['blackout']) for p in people_data]
+    return ScheduleRequest(people=people, year=year, quarter=quarter, **options)
 
-def get_next_workday(date):
-    d = date + datetime.timedelta(days=1)
-    while not is_workday(d):
-        d += datetime.timedelta(days=1)
-    return d
+def check_schedule_feasibility(people_data, year, quarter, quarters=(), group_sizes=(2,), trips_per_day=0):
+    """排期前的快速预检，返回无法满足的原因列表"""
+    return check(build_request(people_data, year, quarter, quarters=list(quarters), group_sizes=tuple(group_sizes),
+                               trips_per_day=trips_per_day))
 
-def get_quarter_range(year, quarter):
-    start_month = (quarter - 1) * 3 + 1
-    start_date = datetime.date(year, start_month, 1)
-    if quarter == 4:
-        end_date = datetime.date(year + 1, 1, 1) - datetime.timedelta(days=1)
-    else:
-        end_date = datetime.date(year, start_month + 3, 1) - datetime.timedelta(days=1)
-    return start_date, end_date
-
-def get_schedulable_dates(year, quarter):
-    start_date, end_date = get_quarter_range(year, quarter)
-    days = []
-    curr = start_date
-    while curr <= end_date:
-        if is_workday(curr):
-            days.append(curr)
-        curr += datetime.timedelta(days=1)
-    if len(days) > 2:
-        return days[1:-1]
-    return days
-
-# === 核心修改：新增年份数据校验函数 ===
-def check_year_support(year):
-    """
-    检查 chinese_calendar 库中是否包含指定年份的节假日数据。
-    原理：尝试获取该年全年的节假日，如果列表为空，说明国务院还没发通知，或者是库没更新。
-    """
-    try:
-        start = datetime.date(year, 1, 1)
-        end = datetime.date(year, 12, 31)
-        holidays = get_holidays(start, end)
-        # 如果一整年一个节假日都没有（连元旦春节都没有），说明数据缺失
-        if len(holidays) == 0:
-            return False
-        return True
-    except NotImplementedError:
-        return False
-    except Exception:
-        return False
-
-class TripEvent:
-    def __init__(self, start_date, end_date, partners):
-        self.start_date = start_date
-        self.end_date = end_date
-        self.partners = partners
-        self.days_count = (end_date - start_date).days + 1
-        self.approval_date = get_prev_workday(start_date)
-        self.reimburse_date = get_next_workday(end_date)
-    def to_dict(self):
-        return {
-            "开始日期": self.start_date,
-            "结束日期": self.end_date,
-            "日期显示": f"{self.start_date.strftime('%m-%d')} ~ {self.end_date.strftime('%m-%d')}" if self.days_count > 1 else f"{self.start_date.strftime('%m-%d')}",
-            "天数": self.days_count,
-            "出差人员": " & ".join(self.partners),
-            "审批日期(前)": self.approval_date.strftime('%Y-%m-%d'),
-            "报销日期(后)": self.reimburse_date.strftime('%Y-%m-%d')
-        }
-
-def run_schedule_logic(people_data, year, quarter):
-    workdays = get_schedulable_dates(year, quarter)
-    workdays_set = set(workdays)
-    daily_occupancy = {d: [] for d in workdays}
-    all_events = []
-
-    class SimplePerson:
-        def __init__(self, data):
-            self.name = data['name']
-            self.target_count = data['count']
-            self.current_count = 0
-            self.blackout_dates = data['blackout']
-        def remaining(self): return self.target_count - self.current_count
-
-    people_objs = [SimplePerson(p) for p in people_data]
-    total_needed = sum(p.target_count for p in people_objs)
-    if total_needed % 2 != 0:
-        people_objs.sort(key=lambda x: x.target_count, reverse=True)
-        solo_p = people_objs[0]
-        for day in workdays:
-            if day not in solo_p.blackout_dates and len(daily_occupancy[day]) == 0:
-                event = TripEvent(day, day, [solo_p.name])
-                all_events.append(event)
-                solo_p.current_count += 1
-                daily_occupancy[day].append(solo_p.name)
-                break
-
-    max_loops = 5000; loop = 0
-    while loop < max_loops:
-        needy = [p for p in people_objs if p.remaining() > 0]
-        if not needy: break
-        needy.sort(key=lambda x: x.remaining(), reverse=True)
-        if len(needy) < 2: break
-        p1, p2 = needy[0], needy[1]
-        try_consecutive = (p1.remaining() >= 2 and p2.remaining() >= 2)
-        success = False
-        trial_days = list(workdays); random.shuffle(trial_days)
-
-        if try_consecutive:
-            for day1 in trial_days:
-                day2 = day1 + datetime.timedelta(days=1)
-                if day2 not in workdays_set: continue
-                if len(daily_occupancy[day1]) not in [0, 2] or len(daily_occupancy[day2]) not in [0, 2]: continue
-                if any(d in p1.blackout_dates or d in p2.blackout_dates for d in [day1, day2]): continue
-                if any(n in daily_occupancy[day1] or n in daily_occupancy[day2] for n in [p1.name, p2.name]): continue
-                event = TripEvent(day1, day2, [p1.name, p2.name])
-                all_events.append(event)
-                p1.current_count += 2; p2.current_count += 2
-                daily_occupancy[day1].extend([p1.name, p2.name]); daily_occupancy[day2].extend([p1.name, p2.name])
-                success = True; break
-        if not success:
-            for day in trial_days:
-                if len(daily_occupancy[day]) not in [0, 2]: continue
-                if day in p1.blackout_dates or day in p2.blackout_dates: continue
-                if p1.name in daily_occupancy[day] or p2.name in daily_occupancy[day]: continue
-                event = TripEvent(day, day, [p1.name, p2.name])
-                all_events.append(event)
-                p1.current_count += 1; p2.current_count += 1
-                daily_occupancy[day].extend([p1.name, p2.name])
-                success = True; break
-        if not success: loop += 1; random.shuffle(people_objs)
-
-    all_events.sort(key=lambda x: x.start_date)
-    return [e.to_dict() for e in all_events], people_objs
+def submit_schedule_job(people_data, year, quarter, strategy="exact", attempts=1, seed=None, time_budget=None,
+                        quarters=(), optimize=0.0, group_sizes=(2,), trips_per_day=0):
+    """把排期请求提交到后台任务池，立即返回任务编号；结果在之后的重跑中按编号获取"""
+    request = build_request(people_data, year, quarter, quarters=list(quarters), strategy=strategy,
+                            attempts=attempts, seed=seed, optimize=optimize, precheck=False,
+                            group_sizes=tuple(group_sizes), trips_per_day=trips_per_day)
+    return get_job_manager().submit(request, time_budget=time_budget)
 
 # ==========================================
 # 2. Streamlit 界面设计
@@ -159,7 +43,26 @@ if 'form_reset_key' not in st.session_state:
 with st.sidebar:
     st.header("⚙️ 季度设置")
     year = st.number_input("年份", 2024, 2030, 2025)
-    quarter = st.selectbox("季度", [1, 2, 3, 4], index=3, format_func=lambda x: f"第 {x} 季度")
+    full_year = st.toggle("全年排期", help="四个季度一次求解，出差次数按全年总数填写；每个季度仍自动隐藏首尾工作日")
+    quarter = st.selectbox("季度", [1, 2, 3, 4], index=3, format_func=lambda x: f"第 {x} 季度", disabled=full_year)
+    quarters = (1, 2, 3, 4) if full_year else (quarter,)
+    with st.expander("🔧 高级选项"):
+        strategy_labels = {"exact": "精确求解", "greedy": "随机贪心", "heap": "大团队模式"}
+        strategy = st.selectbox("排期算法", list(strategy_labels), format_func=strategy_labels.get)
+        attempts = st.number_input("尝试次数（取最优）", 1, 64, 1)
+        seed_text = st.text_input("随机种子", placeholder="留空则随机", help="填入上次结果显示的种子即可复现排期；输入不变时会直接返回缓存结果，想换一种排法请换一个种子")
+        seed, seed_valid = None, True
+        if seed_text.strip():
+            seed_valid = seed_text.strip().isdigit()
+            if seed_valid:
+                seed = int(seed_text)
+            else:
+                st.error("随机种子必须是非负整数，留空则随机")
+        time_budget = st.number_input("时间预算（秒）", 1, 600, 30, help="超时后返回已经排好的部分结果")
+        optimize = st.number_input("质量优化（秒）", 0, 60, 0, help="排好后继续优化：日期分布更均匀、搭档轮换、尽量连续两天；0 表示不优化。按固定迭代次数执行，同一种子结果相同，实际耗时随电脑快慢略有不同")
+        group_sizes = st.multiselect("每组人数", [1, 2, 3, 4], default=[2],
+                                     help="默认两人一组；可加选 3 人（或允许单人）。不是只选 2 时为分组模式，不做质量优化") or [2]
+        trips_per_day = st.number_input("每天最多几组", 1, 20, 2, help="同一天最多几组同时出差")
     st.divider()
     
     # === 核心修改：年份校验逻辑 ===
@@ -175,13 +78,13 @@ with st.sidebar:
             "⚠️ 为了防止排期错误，系统已暂停服务。"
         )
 
-st.title(f"✈️ 差旅排期助手 ({year} Q{quarter})")
+st.title(f"✈️ 差旅排期助手 ({year} {'全年' if full_year else f'Q{quarter}'})")
 
 if is_year_valid:
     # ====== 只有年份有效时，才加载下面的核心界面 ======
     @st.cache_data
-    def get_safe_workday_df(y, q):
-        safe_days = get_schedulable_dates(y, q)
+    def get_safe_workday_df(y, qs):
+        safe_days = get_horizon_dates(y, qs)
         date_list = []
         for curr in safe_days:
             weekday_num = curr.weekday()
@@ -189,57 +92,64 @@ if is_year_valid:
             date_list.append({"日期对象": curr, "日期": curr.strftime('%m-%d'), "星期": f"周{weekday_str}"})
         return pd.DataFrame(date_list)
 
-    df_calendar = get_safe_workday_df(year, quarter)
+    # 界面分成几个独立的片段（st.fragment）：勾选黑名单日期、切换姓名或次数只重跑人员录入这一块，
+    # 下载、展开诊断只重跑结果这一块；添加或清空人员会改变其他部分，才整页重跑。
 
     # --- 1. 人员录入 ---
-    with st.container(border=True):
-        st.markdown("#### 👤 1. 添加人员")
-        col_input, col_table = st.columns([1, 1.5])
-        
-        with col_input:
-            preset_names = ["刘莉", "刘金武", "冯元发", "卿椿", "徐聪"]
-            select_options = preset_names + ["➕ 手动输入新名字..."]
+    @st.fragment
+    def person_form(y, qs, full_year):
+        df_calendar = get_safe_workday_df(y, qs)
+        with st.container(border=True):
+            st.markdown("#### 👤 1. 添加人员")
+            col_input, col_table = st.columns([1, 1.5])
             
-            selected_option = st.selectbox("选择姓名", select_options)
-            
-            if selected_option == "➕ 手动输入新名字...":
-                final_name = st.text_input("请输入新姓名", placeholder="例如：王小明")
-            else:
-                final_name = selected_option
+            with col_input:
+                preset_names = ["刘莉", "刘金武", "冯元发", "卿椿", "徐聪"]
+                select_options = preset_names + ["➕ 手动输入新名字..."]
                 
-            new_count = st.number_input("出差次数", 1, 30, 15)
-            st.write("") 
-            st.write("") 
-            # 按钮保持原样，如果新版 Streamlit 报错，可删除 use_container_width 参数
-            add_btn = st.button("➕ 确认添加人员", type="primary", use_container_width=True)
+                selected_option = st.selectbox("选择姓名", select_options)
+                
+                if selected_option == "➕ 手动输入新名字...":
+                    final_name = st.text_input("请输入新姓名", placeholder="例如：王小明")
+                else:
+                    final_name = selected_option
+                    
+                new_count = st.number_input("出差次数（全年）" if full_year else "出差次数", 1, 120 if full_year else 30, 15)
+                st.write("") 
+                st.write("") 
+                # 按钮保持原样，如果新版 Streamlit 报错，可删除 use_container_width 参数
+                add_btn = st.button("➕ 确认添加人员", type="primary", use_container_width=True)
 
-        with col_table:
-            st.markdown("**👇 勾选无法出差的日期:**")
-            selection = st.dataframe(
-                df_calendar[["日期", "星期"]], 
-                height=300, 
-                hide_index=True,
-                width="stretch",
-                on_select="rerun", 
-                selection_mode="multi-row",
-                key=f"date_selector_{st.session_state.form_reset_key}" 
-            )
+            with col_table:
+                st.markdown("**👇 勾选无法出差的日期:**")
+                selection = st.dataframe(
+                    df_calendar[["日期", "星期"]], 
+                    height=300, 
+                    hide_index=True,
+                    width="stretch",
+                    on_select="rerun", 
+                    selection_mode="multi-row",
+                    key=f"date_selector_{st.session_state.form_reset_key}" 
+                )
 
-        if add_btn:
-            if final_name:
-                selected_rows = selection.selection.rows
-                blackout_dates = []
-                if selected_rows:
-                    blackout_dates = df_calendar.iloc[selected_rows]["日期对象"].tolist()
-                st.session_state.people_list.append({"name": final_name, "count": new_count, "blackout": blackout_dates})
-                st.toast(f"✅ 已添加 {final_name}", icon="🎉")
-                st.session_state.form_reset_key += 1 
-                st.rerun()
-            else:
-                st.error("姓名不能为空！")
+            if add_btn:
+                if final_name:
+                    selected_rows = selection.selection.rows
+                    blackout_dates = []
+                    if selected_rows:
+                        blackout_dates = df_calendar.iloc[selected_rows]["日期对象"].tolist()
+                    st.session_state.people_list.append({"name": final_name, "count": new_count, "blackout": blackout_dates})
+                    st.toast(f"✅ 已添加 {final_name}", icon="🎉")
+                    st.session_state.form_reset_key += 1 
+                    st.rerun(scope="app")   # 人员列表在片段之外，需要整页重跑
+                else:
+                    st.error("姓名不能为空！")
 
     # --- 2. 列表展示 ---
-    if st.session_state.people_list:
+    @st.fragment
+    def people_panel():
+        if not st.session_state.people_list:
+            return
         st.divider()
         st.markdown("#### 📋 已添加人员列表")
         disp_rows = []
@@ -254,34 +164,121 @@ if is_year_valid:
         if st.button("🗑️ 清空所有人员", type="secondary"):
             st.session_state.people_list = []
             st.session_state.form_reset_key += 1
-            st.rerun()
+            st.rerun(scope="app")
+
+    person_form(year, quarters, full_year)
+    people_panel()
 
     # --- 3. 生成结果 ---
+    def result_view(job):
+        """结果表格和 CSV 只在任务完成后生成一次，存在会话状态里，之后的整页重跑直接复用"""
+        view = st.session_state.get("result_view")
+        if view is not None and view["job_id"] == job.id:
+            return view
+        result = job.result
+        periods = job.request.periods
+        by_quarter = result.counts_by_quarter() if len(periods) > 1 else {}
+        stat_data = []
+        for p in result.people:
+            row = {"姓名": p.name, "目标": p.target_count, "实际": p.current_count, "状态": p.status}
+            for q in (periods if by_quarter else []):
+                row[f"Q{q}"] = by_quarter[p.name].get(q, 0)
+            stat_data.append(row)
+
+        # CSV 直接从按列存储的行程表写出；Excel 和日历在点击时才生成
+        export_stats = SolverStats()
+        with export_stats.phase("export"):
+            csv = export_bytes("csv", result.store, with_quarter=len(periods) > 1)
+        view = {
+            "job_id": job.id,
+            "stats": pd.DataFrame(stat_data),
+            "table": result.store.to_frame()[["日期显示", "天数", "出差人员", "审批日期(前)", "报销日期(后)"]],
+            "csv": csv,
+            "timings": {**result.stats.timings, **export_stats.timings},
+        }
+        st.session_state.result_view = view
+        return view
+
+    @st.fragment
+    def render_result(job):
+        result = job.result
+        if not len(result.store):
+            st.error("计算失败，请检查条件。")
+            return
+        view = result_view(job)
+        st.success("✅ 计算完成！")
+        if result.stats.get("deadline_hit"):
+            st.warning("⏱️ 已达到时间预算，以下为目前排好的部分结果。")
+        if result.seeds and job.request.attempts > 1:
+            quarter_seeds = "、".join(f"Q{q} {s}" for q, s in result.seeds.items())
+            st.caption(f"🎲 随机种子：{result.seed}，各季度最优种子 {quarter_seeds}"
+                       f"（在高级选项中填入该种子、尝试次数保持 {job.request.attempts} 即可复现）")
+        else:
+            st.caption(f"🎲 随机种子：{result.seed}（在高级选项中填入该种子、尝试次数设为 1 即可复现）")
+        st.markdown(f"### 📊 最终统计 ({job.request.year} {job.request.period_tag})")
+        st.dataframe(view["stats"], width="stretch")
+        st.dataframe(view["table"], width="stretch", height=600)
+
+        store, with_quarter = result.store, len(job.request.periods) > 1
+        file_stem = f'Trip_{job.request.year}_{job.request.period_tag}'
+        col_csv, col_xlsx, col_ics = st.columns(3)
+        col_csv.download_button("📥 下载表格 (CSV)", data=view["csv"], file_name=f'{file_stem}.csv', mime=MIME_TYPES["csv"])
+        col_xlsx.download_button("📥 下载 Excel", data=lambda: export_bytes("xlsx", store, with_quarter=with_quarter),
+                                 file_name=f'{file_stem}.xlsx', mime=MIME_TYPES["xlsx"])
+        col_ics.download_button("📅 下载日历 (ics)", data=lambda: export_bytes("ics", store, name=file_stem),
+                                file_name=f'{file_stem}.ics', mime=MIME_TYPES["ics"])
+
+        with st.expander("🔍 诊断信息"):
+            col_t, col_c = st.columns(2)
+            col_t.dataframe(pd.DataFrame(
+                [{"阶段": k, "耗时(ms)": round(v * 1000, 2)} for k, v in view["timings"].items()]),
+                hide_index=True, width="stretch")
+            col_c.dataframe(pd.DataFrame(
+                [{"计数器": k, "次数": v} for k, v in sorted(result.stats.counters.items())]),
+                hide_index=True, width="stretch")
+
+    @st.fragment(run_every=0.5)
+    def job_progress_panel(job_id):
+        """只重跑这一小块来轮询任务进度，任务结束后整页重跑显示结果"""
+        job = get_job_manager().get(job_id)
+        if job is None or job.finished:
+            st.rerun()
+        done, total = job.progress
+        text = "⏳ 排队中..." if job.status == QUEUED else f"正在排期... 已安排 {done}/{total} 次"
+        st.progress(job.control.fraction, text=text)
+        if st.button("⏹️ 取消排期", key=f"cancel_{job_id}"):
+            get_job_manager().cancel(job_id)
+
     st.divider()
     if st.button("🚀 生成排期表", type="primary", use_container_width=True):
-        if st.session_state.people_list:
-            with st.spinner("正在排期..."):
-                results, people_objs = run_schedule_logic(st.session_state.people_list, year, quarter)
-                if not results:
-                    st.error("计算失败，请检查条件。")
-                else:
-                    st.success("✅ 计算完成！")
-                    st.markdown("### 📊 最终统计")
-                    stat_data = []
-                    for p in people_objs:
-                        status = "✅ 完成" if p.current_count == p.target_count else f"⚠️ 缺 {p.target_count - p.current_count} 次"
-                        stat_data.append({"姓名": p.name, "目标": p.target_count, "实际": p.current_count, "状态": status})
-                    
-                    st.dataframe(pd.DataFrame(stat_data), width="stretch")
-
-                    df_res = pd.DataFrame(results)
-                    st.dataframe(df_res[["日期显示", "天数", "出差人员", "审批日期(前)", "报销日期(后)"]], width="stretch", height=600)
-                    
-                    csv = df_res.to_csv(index=False).encode('utf-8-sig')
-                    st.download_button("📥 下载表格", data=csv, file_name=f'Trip_{year}_Q{quarter}.csv', mime='text/csv')
+        problems = check_schedule_feasibility(st.session_state.people_list, year, quarter, quarters, group_sizes,
+                                              trips_per_day) if st.session_state.people_list else []
+        if not seed_valid:
+            st.error("❌ 随机种子必须是非负整数，请在高级选项中修改或留空")
+        elif problems:
+            st.error("❌ 当前条件下无法排满，请调整后再试：\n\n" + "\n".join(f"- {msg}" for msg in problems))
+        elif st.session_state.people_list:
+            try:
+                st.session_state.job_id = submit_schedule_job(
+                    st.session_state.people_list, year, quarter, strategy=strategy, attempts=attempts, seed=seed,
+                    time_budget=time_budget, quarters=quarters, optimize=optimize, group_sizes=group_sizes,
+                    trips_per_day=trips_per_day)
+            except JobQueueFull:
+                st.warning("⏳ 当前排期任务较多，请稍后再试。")
         else:
             st.warning("请先在上一步添加人员！")
 
+    job = get_job_manager().get(st.session_state.get("job_id"))
+    if job is not None:
+        if not job.finished:
+            job_progress_panel(job.id)
+        elif job.status == DONE:
+            render_result(job)
+        elif job.status == CANCELLED:
+            st.info("已取消本次排期。")
+        else:
+            st.error(f"计算失败：{job.error}")
+
 else:
     # ====== 如果年份无效，显示大大的错误提示 ======
     st.error("⛔ 当前年份数据缺失，系统已锁定。")
@@ -292,4 +289,9 @@ else:
     ### 如何解决？
     1. **等待更新**：请等待国务院发布 {year} 年放假安排（通常在上一年的 12 月发布）。
     2. **更新软件**：发布后，请联系开发者重新打包最新版本的软件。
+    3. **本地补充**：管理员可以不等新版本，把 {year} 年的放假安排写入 `holidays.json`
+       （格式：`{{"holidays": ["{year}-01-01", ...], "workdays": ["调休上班日", ...]}}`），
+       放到 `{data_dir()}` 目录后重启程序即可。
     """)
+    for msg in holiday_table().errors:
+        st.warning(f"⚠️ 补充文件无法解析，已跳过：{msg}")
@@ -1,227 +1,124 @@
-import datetime
-import random
-import csv
-from chinese_calendar import is_workday
+import argparse
+from tripsync.engine import PersonSpec, ScheduleRequest, parse_blackout, schedule
+from tripsync.export import FORMATS, write_csv, write_ics, write_xlsx
 
 # ===========================
 # 1. 基础类与工具
 # ===========================
 
-class TripEvent:
-    """表示一次出差事件"""
-    def __init__(self, start_date, end_date, partners):
-        self.start_date = start_date
-        self.end_date = end_date
-        self.partners = partners # 出差人员名单
-        self.days_count = (end_date - start_date).days + 1
-        
-        # 自动计算关联日期
-        self.approval_date = get_prev_workday(start_date)
-        self.reimburse_date = get_next_workday(end_date)
-
-    def to_csv_row(self):
-        """转为CSV行数据"""
-        date_str = f"{self.start_date.strftime('%Y/%m/%d')}"
-        if self.days_count > 1:
-            date_str += f"-{self.end_date.strftime('%m/%d')}"
-            
-        names = ",".join(self.partners)
-        return [
-            date_str, 
-            self.days_count, 
-            names, 
-            self.approval_date.strftime('%Y/%m/%d'), 
-            self.reimburse_date.strftime('%Y/%m/%d')
-        ]
-
-class Person:
-    def __init__(self, name, target_count, blackout_strs, year):
-        self.name = name
-        self.target_count = target_count
-        self.current_count = 0
-        self.blackout_dates = self._parse_dates(year, blackout_strs)
-
-    def _parse_dates(self, year, date_strs):
-        dates = []
-        for s in date_strs:
-            try:
-                m, d = map(int, s.split('-'))
-                dates.append(datetime.date(year, m, d))
-            except:
-                pass
-        return dates
-
-    def remaining_count(self):
-        return self.target_count - self.current_count
-
-# --- 日期计算工具 ---
-
-def get_prev_workday(date):
-    d = date - datetime.timedelta(days=1)
-    while not is_workday(d):
-        d -= datetime.timedelta(days=1)
-    return d
-
-def get_next_workday(date):
-    d = date + datetime.timedelta(days=1)
-    while not is_workday(d):
-        d += datetime.timedelta(days=1)
-    return d
-
-def get_quarter_workdays(year, quarter):
-    start_month = (quarter - 1) * 3 + 1
-    start_date = datetime.date(year, start_month, 1)
-    if quarter == 4:
-        end_date = datetime.date(year + 1, 1, 1) - datetime.timedelta(days=1)
-    else:
-        end_date = datetime.date(year, start_month + 3, 1) - datetime.timedelta(days=1)
-    
-    days = []
-    curr = start_date
-    while curr <= end_date:
-        if is_workday(curr):
-            days.append(curr)
-        curr += datetime.timedelta(days=1)
-    return days
+def Person(name, target_count, blackout_strs, year):
+    """配置区使用的简写：黑名单为 'MM-DD' 字符串列表"""
+    return PersonSpec(name, target_count, parse_blackout(year, blackout_strs))
+
+def parse_quarters(text):
+    """'1-4' 或 '1,2' -> [1, 2, 3, 4] / [1, 2]；空字符串 -> []。季度必须在 1~4 之内（用作 argparse 的 type）"""
+    quarters = []
+    for part in filter(None, text.replace(" ", "").split(",")):
+        lo, _, hi = part.partition("-")
+        try:
+            lo, hi = int(lo), int(hi or lo)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"无法识别的季度：{part}（应为 1-4 或 1,2 这样的写法）")
+        if not 1 <= lo <= hi <= 4:
+            raise argparse.ArgumentTypeError(f"季度超出范围：{part}（季度为 1~4，区间需从小到大）")
+        quarters.extend(range(lo, hi + 1))
+    return quarters
 
 # ===========================
 # 2. 核心调度逻辑
 # ===========================
 
-def solve_schedule_v4(people, year, quarter):
-    print(f"🚀 正在计算 {year}年 Q{quarter} 总控排期表...\n")
-
-    workdays = get_quarter_workdays(year, quarter)
-    workdays_set = set(workdays)
-    daily_occupancy = {d: [] for d in workdays}
-    
-    # 用于存储所有生成的行程事件 (Master List)
-    all_events = []
-
-    # --- 步骤 1: 平衡奇数总额 (单人行程) ---
-    total_needed = sum(p.target_count for p in people)
-    if total_needed % 2 != 0:
-        people.sort(key=lambda x: x.target_count, reverse=True)
-        solo_p = people[0]
-        # 找空闲日
-        for day in workdays:
-            if day not in solo_p.blackout_dates and len(daily_occupancy[day]) == 0:
-                event = TripEvent(day, day, [solo_p.name])
-                all_events.append(event)
-                solo_p.current_count += 1
-                daily_occupancy[day].append(solo_p.name)
-                break
-
-    # --- 步骤 2: 循环双人调度 ---
-    max_loops = 2000
-    loop = 0
-    
-    while loop < max_loops:
-        needy = [p for p in people if p.remaining_count() > 0]
-        if not needy: break
-
-        needy.sort(key=lambda x: x.remaining_count(), reverse=True)
-        if len(needy) < 2: break
-
-        p1 = needy[0]
-        p2 = needy[1]
-        
-        # 策略：优先找连续2天
-        try_consecutive = (p1.remaining_count() >= 2 and p2.remaining_count() >= 2)
-        success = False
-        
-        # 随机遍历日期
-        trial_days = list(workdays)
-        random.shuffle(trial_days)
-
-        # A. 尝试连续两天
-        if try_consecutive:
-            for day1 in trial_days:
-                day2 = day1 + datetime.timedelta(days=1)
-                
-                if day2 not in workdays_set: continue
-                if len(daily_occupancy[day1]) not in [0, 2] or len(daily_occupancy[day2]) not in [0, 2]: continue
-                
-                # 黑名单检查
-                if any(d in p1.blackout_dates or d in p2.blackout_dates for d in [day1, day2]): continue
-                # 自身排期检查 (这里简化，因为没有存具体日期，只检查占用表即可，更严谨需存list)
-                if p1.name in daily_occupancy[day1] or p1.name in daily_occupancy[day2]: continue
-                if p2.name in daily_occupancy[day1] or p2.name in daily_occupancy[day2]: continue
-
-                # 锁定
-                event = TripEvent(day1, day2, [p1.name, p2.name])
-                all_events.append(event)
-                
-                p1.current_count += 2
-                p2.current_count += 2
-                daily_occupancy[day1].extend([p1.name, p2.name])
-                daily_occupancy[day2].extend([p1.name, p2.name])
-                success = True
-                break
-        
-        # B. 尝试单天
-        if not success:
-            for day in trial_days:
-                if len(daily_occupancy[day]) not in [0, 2]: continue
-                if day in p1.blackout_dates or day in p2.blackout_dates: continue
-                if p1.name in daily_occupancy[day] or p2.name in daily_occupancy[day]: continue
-                
-                event = TripEvent(day, day, [p1.name, p2.name])
-                all_events.append(event)
-                
-                p1.current_count += 1
-                p2.current_count += 1
-                daily_occupancy[day].extend([p1.name, p2.name])
-                success = True
-                break
-        
-        if not success:
-            loop += 1
-            random.shuffle(people)
+def solve_schedule_v4(people, year, quarter, strategy="exact", attempts=1, seed=None, trim_edges=True,
+                      profile=False, quarters=None, optimize=0.0, formats=("csv",), group_sizes=(2,), trips_per_day=0):
+    # quarters 不为空时按多季度 / 全年一次求解（每个季度仍去掉首尾工作日）
+    # group_sizes / trips_per_day 不是默认值时为分组模式（如三人一组、每天多组）
+    request = ScheduleRequest(people=people, year=year, quarter=quarter, quarters=quarters or [],
+                              strategy=strategy, attempts=attempts, seed=seed, trim_edges=trim_edges,
+                              optimize=optimize, group_sizes=tuple(group_sizes), trips_per_day=trips_per_day)
+    print(f"🚀 正在计算 {year}年 {request.period_tag} 总控排期表...\n")
+
+    # 精确求解（找不到完整解时自动退回随机贪心），strategy="greedy" 可直接使用原算法
+    # attempts > 1 时用多个种子并行求解，保留最好的一份
+    result = schedule(request)
+
+    # 快速预检：明显排不满时直接给出原因
+    if result.problems:
+        print("❌ 当前条件下无法排满：")
+        for msg in result.problems:
+            print(f"   - {msg}")
+        return result
+
+    # 用于存储所有生成的行程事件 (Master List)，已按开始日期排序（按列存储）
+    store = result.store
 
     # ===========================
     # 3. 输出报表 (按日期排序)
     # ===========================
-    
-    # 核心：按开始日期排序
-    all_events.sort(key=lambda x: x.start_date)
 
     print("="*85)
     print(f"{'出差日期 (填单)':<20} | {'天数':<6} | {'出差人员':<15} | {'审批日期 (前)':<15} | {'报销日期 (后)':<15}")
     print("-" * 85)
 
-    for e in all_events:
-        # 格式化输出
-        if e.days_count > 1:
-            date_str = f"{e.start_date.strftime('%m-%d')} ~ {e.end_date.strftime('%m-%d')}"
-        else:
-            date_str = f"{e.start_date.strftime('%m-%d')}"
-        
-        names_str = " & ".join(e.partners)
-        app_str = e.approval_date.strftime('%m-%d')
-        reim_str = e.reimburse_date.strftime('%m-%d')
-        
-        print(f"{date_str:<24} | {e.days_count:<8} | {names_str:<19} | {app_str:<19} | {reim_str:<15}")
+    cols = store.table_columns()
+    for date_str, days, names_str, app_str, reim_str in zip(
+            cols["日期显示"], cols["天数"], cols["出差人员"], cols["审批日期(前)"], cols["报销日期(后)"]):
+        # 格式化输出（审批/报销只显示月-日）
+        print(f"{date_str:<24} | {days:<8} | {names_str:<19} | {app_str[5:]:<19} | {reim_str[5:]:<15}")
 
     print("="*85)
     
-    # 导出 CSV
-    filename = f"travel_schedule_{year}_Q{quarter}.csv"
-    with open(filename, 'w', newline='', encoding='utf-8-sig') as f:
-        writer = csv.writer(f)
-        writer.writerow(["出差日期", "天数", "出差人员", "审批日期(建议)", "报销日期(建议)"])
-        for e in all_events:
-            writer.writerow(e.to_csv_row())
+    # 导出 CSV / Excel / 日历（直接从按列存储的行程表逐行写出）
+    writers = {"csv": write_csv, "xlsx": write_xlsx, "ics": write_ics}
+    filenames = []
+    with result.stats.phase("export"):
+        for fmt in formats:
+            filename = f"travel_schedule_{year}_{request.period_tag}.{fmt}"
+            with open(filename, 'wb') as f:
+                writers[fmt](f, store)
+            filenames.append(filename)
             
-    print(f"\n✅ 文件已导出: {filename} (可直接用Excel打开)")
+    print(f"\n✅ 文件已导出: {', '.join(filenames)} (csv / xlsx 可直接用Excel打开，ics 可导入日历)")
+    if result.seeds and request.attempts > 1:
+        # 逐季度多起点求解：各季度的最优种子不同，原种子配合同样的尝试次数才能复现
+        quarter_seeds = "、".join(f"Q{q} {s}" for q, s in result.seeds.items())
+        print(f"🎲 随机种子: {result.seed}，各季度最优种子 {quarter_seeds} "
+              f"(使用 --seed {result.seed} --attempts {request.attempts} 可复现)")
+    else:
+        replay = f"--seed {result.seed}" + (" --attempts 1" if request.attempts > 1 else "")
+        print(f"🎲 随机种子: {result.seed} (使用 {replay} 可复现)")
     print("📈 最终统计:")
-    for p in people:
-        print(f"   {p.name}: {p.current_count}/{p.target_count}")
+    by_quarter = result.counts_by_quarter() if len(request.periods) > 1 else {}
+    for p in result.people:
+        detail = ""
+        if by_quarter:
+            detail = "  (" + ", ".join(f"Q{q}: {by_quarter[p.name].get(q, 0)}" for q in request.periods) + ")"
+        print(f"   {p.name}: {p.current_count}/{p.target_count}{detail}")
+    if profile:
+        print(f"\n🩺 求解诊断 (排期耗时 {result.wall_time * 1000:.2f} ms):")
+        print(result.stats.report())
+    return result
 
 # ===========================
 # 4. 配置区域
 # ===========================
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="TripSync 命令行排期")
+    parser.add_argument("--strategy", default="exact", choices=["exact", "greedy", "heap"], help="排期算法")
+    parser.add_argument("--attempts", type=int, default=1, help="多起点尝试次数，取最优结果")
+    parser.add_argument("--seed", type=int, default=None, help="随机种子，用于复现结果")
+    parser.add_argument("--no-trim", action="store_true", help="不排除季度首尾工作日")
+    parser.add_argument("--profile", action="store_true", help="输出分阶段耗时和求解计数器")
+    parser.add_argument("--optimize", type=float, default=0.0, metavar="SECONDS",
+                        help="求解后用局部搜索优化排期质量（日期分布、搭档轮换、连续天数）的大致秒数（按固定迭代次数执行，同一种子结果相同）")
+    parser.add_argument("--quarters", type=parse_quarters, default="", help="多季度一次排期，如 1-4（全年）或 1,2；默认只排配置的季度")
+    parser.add_argument("--export", default="csv", help=f"导出格式，逗号分隔：{','.join(FORMATS)}")
+    parser.add_argument("--group-sizes", default="2", help="允许的每组人数，逗号分隔，如 2,3（含 1 允许单人出差）")
+    parser.add_argument("--trips-per-day", type=int, default=0, help="分组模式下每天最多几组同时出差，0 表示两组")
+    args = parser.parse_args()
+    export_formats = [x.strip() for x in args.export.split(",") if x.strip()]
+    if set(export_formats) - set(FORMATS):
+        parser.error(f"未知的导出格式: {args.export}")
+
     TARGET_YEAR = 2025
     TARGET_QUARTER = 4
     
@@ -234,4 +131,8 @@ if __name__ == "__main__":
         Person("徐聪", 20, ['10-20', '11-07', '11-13', '11-24', '12-04', '12-08', '12-09', '12-10', '12-11', '12-15', '12-19', '12-22', '12-24', '12-25'], TARGET_YEAR)
     ]
     
-    solve_schedule_v4(user_configs, TARGET_YEAR, TARGET_QUARTER)
\ No newline at end of file
+    solve_schedule_v4(user_configs, TARGET_YEAR, TARGET_QUARTER,
+                      strategy=args.strategy, attempts=args.attempts, seed=args.seed, trim_edges=not args.no_trim,
+                      profile=args.profile, quarters=args.quarters, optimize=args.optimize,
+                      formats=export_formats, group_sizes=[int(x) for x in args.group_sizes.split(",")],
+                      trips_per_day=args.trips_per_day)
\ No newline at end of file
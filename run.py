@@ -1,8 +1,11 @@
-import streamlit.web.cli as stcli
 import os, sys
+import multiprocessing
 import socket
+import threading
+import time
 import webbrowser
-from threading import Timer
+
+PORT = 8501
 
 def resolve_path(path):
     if getattr(sys, "frozen", False):
@@ -12,7 +15,18 @@ def resolve_path(path):
     return os.path.join(basedir, path)
 
 def open_browser():
-    webbrowser.open_new("http://localhost:8501")
+    webbrowser.open_new(f"http://localhost:{PORT}")
+
+def open_browser_when_ready(stats, started, warm_thread=None):
+    """服务器健康检查通过后再打开浏览器（不再固定等 1 秒）"""
+    from tripsync.startup import profiling, record, wait_until_ready
+    ready = wait_until_ready(f"http://localhost:{PORT}/_stcore/health")
+    stats.timings["server ready"] = time.perf_counter() - started
+    if not ready:
+        stats.count("ready_timeout")
+    open_browser()
+    if profiling():
+        record(stats, started, warm_thread)
 
 def get_local_ip():
     try:
@@ -25,15 +39,27 @@ def get_local_ip():
         return "Unknown"
 
 if __name__ == "__main__":
-    # ... (前面的打印代码保持不变) ...
+    # 多起点并行排期会启动子进程，打包成 exe 后必须先调用，否则子进程会重新启动整个程序
+    multiprocessing.freeze_support()
+    started = time.perf_counter()
+
+    # 重模块（streamlit / pandas）都推迟到这里之后再导入，先让用户看到启动提示
     ip = get_local_ip()
     print("-" * 50)
     print(f"✅ 程序启动成功！")
-    print(f"🌍 本机访问地址: http://localhost:8501")
-    print(f"📡 局域网访问地址: http://{ip}:8501")
+    print(f"🌍 本机访问地址: http://localhost:{PORT}")
+    print(f"📡 局域网访问地址: http://{ip}:{PORT}")
     print("-" * 50)
 
-    Timer(1, open_browser).start()
+    # 后台预热：页面要用的模块、节假日表和年历与服务器启动同时进行（页面脚本在同一进程内运行，直接复用）
+    from tripsync.startup import start_warm_up
+    from tripsync.stats import SolverStats
+    stats = SolverStats()
+    warm_thread = start_warm_up(stats)
+    threading.Thread(target=open_browser_when_ready, args=(stats, started, warm_thread), daemon=True).start()
+
+    with stats.phase("import streamlit"):
+        import streamlit.web.cli as stcli
 
     # === 关键修改在这里 ===
     sys.argv = [
@@ -41,10 +67,11 @@ if __name__ == "__main__":
         "run",
         resolve_path("app.py"),
         "--server.address=0.0.0.0",
+        f"--server.port={PORT}",
         "--global.developmentMode=false",
         "--server.headless=true",       # 1. 禁用交互式提示（防止黑框卡住询问）
         "--browser.gatherUsageStats=false", # 2. 彻底禁用数据收集（这是不再询问邮箱的关键）
         "--theme.base=light"            # (可选) 强制浅色主题，看起来更专业
     ]
     
-    sys.exit(stcli.main())
\ No newline at end of file
+    sys.exit(stcli.main())
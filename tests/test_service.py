@@ -0,0 +1,151 @@
+import http.client
+import json
+import threading
+import unittest
+
+from tripsync.engine import PersonSpec, ScheduleRequest
+from tripsync.service import MAX_BODY, RequestError, ScheduleService, make_server, parse_request
+
+# ==========================================
+# 本地排期服务的接口测试：400 / 413 / 429 / 500 都必须返回 JSON，不能断开连接
+# ==========================================
+#
+#   python -m unittest discover -s tests
+
+YEAR = 2025
+
+
+def _request(**person):
+    row = dict({"name": "A", "count": 2}, **person)
+    return {"year": YEAR, "quarter": 1, "people": [row, {"name": "B", "count": 2}]}
+
+
+class ServiceTestCase(unittest.TestCase):
+    workers, max_queued, max_batch = 2, 4, 8
+
+    def setUp(self):
+        self.service = ScheduleService(self.workers, self.max_queued, self.max_batch, timeout=30.0)
+        self.server = make_server(port=0, service=self.service, warm=False)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def post(self, body, headers=None):
+        """发送 POST /schedule，body 为字节时原样发送；自定义 headers 时不发送 body。返回 (状态码, 响应对象, 响应)"""
+        data = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+        conn = http.client.HTTPConnection("127.0.0.1", self.server.server_port, timeout=30)
+        try:
+            conn.putrequest("POST", "/schedule")
+            for name, value in (headers if headers is not None else {"Content-Length": str(len(data))}).items():
+                conn.putheader(name, value)
+            conn.endheaders()
+            if headers is None:
+                conn.send(data)
+            resp = conn.getresponse()
+            return resp.status, json.loads(resp.read()), resp
+        finally:
+            conn.close()
+
+
+class BadRequestTest(ServiceTestCase):
+
+    def assertBadRequest(self, body):
+        status, payload, _ = self.post(body)
+        self.assertEqual(status, 400, payload)
+        self.assertIn("error", payload)
+
+    def test_ok(self):
+        status, payload, _ = self.post(_request())
+        self.assertEqual(status, 200, payload)
+        self.assertEqual(payload["unmet"], 0)
+
+    def test_blackout_not_strings(self):
+        self.assertBadRequest(_request(blackout=[5]))
+
+    def test_quarter_counts_not_dict(self):
+        self.assertBadRequest(_request(quarter_counts=[1, 2]))
+
+    def test_quarter_counts_not_int(self):
+        self.assertBadRequest(_request(quarter_counts={"1": "x"}))
+
+    def test_person_not_dict(self):
+        self.assertBadRequest({"year": YEAR, "quarter": 1, "people": ["A"]})
+
+    def test_negative_count(self):
+        self.assertBadRequest(_request(count=-1))
+
+    def test_time_budget_not_finite(self):
+        for value in ("nan", "inf", -1):
+            with self.subTest(time_budget=value):
+                self.assertBadRequest(dict(_request(), time_budget=value))
+
+    def test_invalid_json(self):
+        self.assertBadRequest(b"{not json")
+
+    def test_content_length_missing(self):
+        status, payload, _ = self.post(b"{}", headers={})
+        self.assertEqual(status, 400, payload)
+
+    def test_content_length_not_int(self):
+        status, payload, _ = self.post(b"{}", headers={"Content-Length": "abc"})
+        self.assertEqual(status, 400, payload)
+
+    def test_content_length_negative(self):
+        status, payload, _ = self.post(b"{}", headers={"Content-Length": "-1"})
+        self.assertEqual(status, 400, payload)
+
+    def test_parse_request_errors(self):
+        with self.assertRaises(RequestError):
+            parse_request(_request(blackout=[None]))
+        request = parse_request(dict(_request(), time_budget=100))
+        self.assertLessEqual(request.time_budget, 10.0)
+
+
+class TooLargeTest(ServiceTestCase):
+
+    def test_body_too_large(self):
+        status, payload, _ = self.post(b"", headers={"Content-Length": str(MAX_BODY + 1)})
+        self.assertEqual(status, 413, payload)
+
+    def test_batch_too_large(self):
+        status, payload, _ = self.post({"requests": [_request()] * (self.max_batch + 1)})
+        self.assertEqual(status, 413, payload)
+
+
+class QueueFullTest(ServiceTestCase):
+    workers, max_queued, max_batch = 1, 0, 1
+
+    def test_queue_full(self):
+        # 一个排不满、不做预检的大团队用贪心一直重试，占住唯一的工作线程直到被取消
+        people = [PersonSpec(f"P{i}", 60, []) for i in range(9)]
+        busy = self.service.jobs.submit(ScheduleRequest(people, YEAR, 1, strategy="greedy", precheck=False,
+                                                        max_loops=10 ** 9), time_budget=30.0)
+        try:
+            status, payload, resp = self.post(_request())
+            self.assertEqual(status, 429, payload)
+            self.assertEqual(resp.getheader("Retry-After"), "1")
+        finally:
+            self.service.jobs.cancel(busy)
+            self.service.jobs.get(busy).wait(10)
+
+
+class InternalErrorTest(ServiceTestCase):
+
+    def test_unexpected_error_returns_500(self):
+        def broken(items, time_budget=None):
+            raise KeyError("boom")
+        self.service.jobs.submit_many = broken
+        status, payload, _ = self.post(_request())
+        self.assertEqual(status, 500, payload)
+        self.assertIn("KeyError", payload["error"])
+        # 服务仍然可用
+        del self.service.jobs.submit_many
+        status, _, _ = self.post(_request())
+        self.assertEqual(status, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1 @@
+"""TripSync 排期核心：工作日历、排期算法等与界面无关的公共逻辑。"""
@@ -0,0 +1,144 @@
+import datetime
+
+# ==========================================
+# 人员 × 日期 可用性位图
+# ==========================================
+# 把可排期的工作日编号为 0..n-1，每个人的可出差日、已占用日都用一个
+# Python 整数的二进制位表示。查"两人都能出差的日子"只需一次按位与，
+# 查"连续两天都能出差"再加一次移位，不再逐天扫描黑名单列表。
+
+DAY_CAPACITY = 4  # 每天最多两组双人出差
+
+
+def iter_bits(mask):
+    """依次返回 mask 中为 1 的位编号（从低位到高位）"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class Availability:
+    """
+    people 需要有 name / blackout_dates；workdays 为已排序的可排期日期。
+    同时维护每日占用情况（替代原来的 daily_occupancy 字典）：
+      open_mask  : 人数为偶数且未满 day_capacity、还能再放一组双人出差的日期
+      empty_mask : 完全空闲、可以安排单人出差的日期
+    """
+
+    def __init__(self, people, workdays, day_capacity=DAY_CAPACITY):
+        self.days = list(workdays)
+        self.capacity = day_capacity
+        self.index = {d: k for k, d in enumerate(self.days)}
+        n = len(self.days)
+        self.full = (1 << n) - 1
+        self.names = [p.name for p in people]
+
+        self.avail = []
+        for p in people:
+            mask = self.full
+            for d in p.blackout_dates:
+                k = self.index.get(d)
+                if k is not None:
+                    mask &= ~(1 << k)
+            self.avail.append(mask)
+
+        # 第 k 位为 1 表示第 k+1 个工作日正好是第 k 个工作日的下一天
+        self.next_day_mask = 0
+        for k in range(n - 1):
+            if (self.days[k + 1] - self.days[k]).days == 1:
+                self.next_day_mask |= 1 << k
+
+        self.busy = [0] * len(people)
+        self.load = [0] * n
+        self.members = [[] for _ in range(n)]
+        self.open_mask = self.full
+        self.empty_mask = self.full
+
+    # --- 查询 ---
+
+    def free(self, i):
+        return self.avail[i] & ~self.busy[i]
+
+    def pair_days(self, i, j):
+        """两人都空闲、且当天还能放一组双人出差的日期"""
+        return self.free(i) & self.free(j) & self.open_mask
+
+    def pair_runs(self, i, j):
+        """第 k 位为 1 表示两人可以在第 k、k+1 天连续出差"""
+        m = self.pair_days(i, j)
+        return m & (m >> 1) & self.next_day_mask
+
+    def solo_days(self, i):
+        return self.free(i) & self.empty_mask
+
+    def is_available(self, i, k):
+        return (self.avail[i] >> k) & 1 == 1
+
+    def available_from(self, i, k):
+        """第 i 人在第 k 天及之后的可出差天数"""
+        return (self.avail[i] >> k).bit_count()
+
+    def occupants(self, day):
+        return list(self.members[self.index[day]])
+
+    # --- 修改 ---
+
+    def place(self, slots, k, length=1):
+        """让 slots 中的人从第 k 天开始连续出差 length 天"""
+        for kk in range(k, k + length):
+            bit = 1 << kk
+            for i in slots:
+                self.busy[i] |= bit
+                self.members[kk].append(self.names[i])
+            self.load[kk] += len(slots)
+            self.empty_mask &= ~bit
+            if self.load[kk] % 2 or self.load[kk] + 2 > self.capacity:
+                self.open_mask &= ~bit
+
+    def preload(self, placements):
+        """
+        把已有的行程 (开始日期, 结束日期, [姓名]) 占进位图（增量修复时保留的行程）。
+        不在本表人员名单里的人、不在可排期日期内的天直接忽略。
+        """
+        slot = {}
+        for i, name in enumerate(self.names):
+            slot.setdefault(name, i)
+        for start, end, names in placements:
+            slots = [slot[n] for n in names if n in slot]
+            for ordinal in range(start.toordinal(), end.toordinal() + 1):
+                k = self.index.get(datetime.date.fromordinal(ordinal))
+                if k is not None and slots:
+                    self.place(slots, k)
+
+
+class GroupAvailability(Availability):
+    """
+    分组模式（每组人数可变）的位图：每天的上限按同时出发的行程组数计，不再按人数奇偶。
+      open_mask : 当天行程组数未满 trips_per_day、还能再放一组的日期
+    """
+
+    def __init__(self, people, workdays, trips_per_day):
+        super().__init__(people, workdays)
+        self.trips_per_day = trips_per_day
+        self.trips = [0] * len(self.days)
+        self.open_mask = self.full if trips_per_day > 0 else 0
+
+    def place(self, slots, k, length=1):
+        for kk in range(k, k + length):
+            bit = 1 << kk
+            for i in slots:
+                self.busy[i] |= bit
+                self.members[kk].append(self.names[i])
+            self.load[kk] += len(slots)
+            self.trips[kk] += 1
+            self.empty_mask &= ~bit
+            if self.trips[kk] >= self.trips_per_day:
+                self.open_mask &= ~bit
+
+    def group_days(self, slots):
+        """slots 中的人都空闲、且当天还能再放一组的日期"""
+        m = self.open_mask
+        for i in slots:
+            m &= self.free(i)
+        return m
@@ -0,0 +1,271 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from tripsync.engine import PersonSpec, ScheduleRequest, parse_blackout, schedule
+from tripsync.export import FORMATS, header, safe_filename, write_csv, write_ics, write_xlsx, write_zip
+from tripsync.workdays import check_year_support, get_calendar
+
+# ==========================================
+# 批量排期命令行（不依赖 Streamlit / pandas）
+# ==========================================
+# 一次为多个部门、多个季度排期，每个部门输出一个 CSV（--formats 可加 xlsx / ics）：
+#
+#   python -m tripsync.batch teams/ -o out/ --year 2026 --quarters 1,2,3,4
+#   python -m tripsync.batch 研发部.json 市场部.csv --workers 4
+#   python -m tripsync.batch teams/ --horizon        # 每个团队的所有季度一次求解（全年排期）
+#   python -m tripsync.batch teams/ --formats csv,xlsx,ics --zip 排期.zip   # 打包，含每人的个人日历
+#
+# JSON 团队文件（可以是单个对象，也可以是对象列表）：
+#   {"team": "研发部", "year": 2026, "quarters": [1, 2],
+#    "strategy": "exact", "seed": 1,
+#    "group_sizes": [2, 3], "trips_per_day": 3,         # 可选：分组模式（每组人数、每天最多几组）
+#    "people": [{"name": "张三", "count": 12, "blackout": ["01-05", "2026-02-10"],
+#                "quarter_counts": {"1": 5}}]}      # 可选：按季度的子目标（--horizon 时使用）
+# CSV 团队文件：表头为 name,count,blackout（黑名单用 ; 或空格分隔），
+#   部门名取文件名，年份和季度取命令行参数。
+# 读取时逐条检查年份（需有节假日数据）、季度和人员字段，有问题时报告文件、位置和原因。
+
+CSV_HEADER = header(with_quarter=True)
+
+
+class TeamFileError(ValueError):
+    """团队文件内容不合法"""
+
+
+def _check_period(path, where, year, quarters):
+    if not check_year_support(year):
+        raise TeamFileError(f"{path} {where}：没有 {year} 年的节假日数据，无法排期")
+    if not quarters or not all(1 <= q <= 4 for q in quarters):
+        raise TeamFileError(f"{path} {where}：季度应为 1-4：{quarters}")
+
+
+def _person(path, where, year, r):
+    """把一行人员数据转成 PersonSpec；where 为出错时报告的位置（如 "第 3 行"）"""
+    if not isinstance(r, dict):
+        raise TeamFileError(f"{path} {where}：人员应为对象")
+    name = str(r.get("name") or "").strip()
+    if not name:
+        raise TeamFileError(f"{path} {where}：缺少姓名 name")
+    try:
+        count = int(r.get("count"))
+    except (TypeError, ValueError):
+        raise TeamFileError(f"{path} {where}（{name}）：出差次数 count 应为整数：{r.get('count')!r}")
+    if count < 0:
+        raise TeamFileError(f"{path} {where}（{name}）：出差次数 count 不能为负：{count}")
+    blackout = r.get("blackout") or []
+    if not isinstance(blackout, list) or not all(isinstance(d, str) for d in blackout):
+        raise TeamFileError(f"{path} {where}（{name}）：黑名单 blackout 应为日期字符串列表")
+    quarter_counts = r.get("quarter_counts") or {}
+    try:
+        quarter_counts = {int(q): int(n) for q, n in quarter_counts.items()}
+    except (AttributeError, TypeError, ValueError):
+        raise TeamFileError(f"{path} {where}（{name}）：quarter_counts 应为 {{季度: 次数}}")
+    return PersonSpec(name, count, parse_blackout(year, blackout), quarter_counts)
+
+
+def load_team_file(path, year, quarters):
+    """读取一个团队文件，返回团队配置列表"""
+    team_name = os.path.splitext(os.path.basename(path))[0]
+    if path.lower().endswith(".json"):
+        with open(path, encoding="utf-8-sig") as f:
+            data = json.load(f)
+        teams = []
+        for i, item in enumerate(data if isinstance(data, list) else [data]):
+            where = f"第 {i + 1} 个团队"
+            if not isinstance(item, dict):
+                raise TeamFileError(f"{path} {where}：团队应为对象")
+            try:
+                y = int(item.get("year", year))
+                qs = [int(q) for q in item.get("quarters", quarters)]
+            except (TypeError, ValueError):
+                raise TeamFileError(f"{path} {where}：year / quarters 应为整数")
+            _check_period(path, where, y, qs)
+            rows = item.get("people")
+            if not isinstance(rows, list):
+                raise TeamFileError(f"{path} {where}：people 应为人员列表")
+            teams.append({
+                "team": item.get("team") or (team_name if i == 0 else f"{team_name}_{i}"),
+                "year": y,
+                "quarters": qs,
+                "strategy": item.get("strategy"),
+                "group_sizes": item.get("group_sizes"),
+                "trips_per_day": item.get("trips_per_day"),
+                "seed": item.get("seed"),
+                "people": [_person(path, f"{where} 第 {j + 1} 个人员", y, r) for j, r in enumerate(rows)],
+            })
+        return teams
+    _check_period(path, "（--year / --quarters）", year, list(quarters))
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        people = []
+        reader = csv.DictReader(f)
+        for r in reader:
+            r["blackout"] = (r.get("blackout") or "").replace(";", " ").split()   # 短行时为 None
+            people.append(_person(path, f"第 {reader.line_num} 行", year, r))
+    return [{"team": team_name, "year": year, "quarters": list(quarters), "strategy": None, "seed": None,
+             "group_sizes": None, "trips_per_day": None, "people": people}]
+
+
+def load_teams(paths, year, quarters):
+    teams = []
+    for path in paths:
+        if os.path.isdir(path):
+            files = sorted(os.path.join(path, n) for n in os.listdir(path) if n.lower().endswith((".json", ".csv")))
+        else:
+            files = [path]
+        for file in files:
+            teams.extend(load_team_file(file, year, quarters))
+    # 输出文件名（和 zip 里的目录名）按团队名生成，不同团队映射到同一个文件名时会互相覆盖，
+    # 这里给后出现的团队加序号（按不区分大小写比较，兼容 Windows / macOS 的文件系统）
+    used = set()
+    for t in teams:
+        name, n = t["team"], 1
+        while safe_filename(name).lower() in used:
+            n += 1
+            name = f"{t['team']}_{n}"
+        if name != t["team"]:
+            print(f"⚠️ 团队名 {t['team']} 与前面的团队重名（或文件名相同），输出改用 {name}", file=sys.stderr)
+            t["team"] = name
+        used.add(safe_filename(name).lower())
+    return teams
+
+
+def _warm_calendar(years):
+    for y in years:
+        get_calendar(y)
+
+
+def run_task(team, year, period, request):
+    """在当前进程（或子进程）中排一个团队的一个季度（或整个区间），只返回可序列化的轻量结果（按列的 EventStore）"""
+    result = schedule(request)
+    status = [(p.name, p.current_count, p.target_count) for p in result.people]
+    return team, period, result.store, status, result.problems, result.seed, result.wall_time
+
+
+def build_tasks(teams, strategy, seed, horizon=False, optimize=0.0, group_sizes=(2,), trips_per_day=0):
+    """horizon 时每个团队一个任务，所有季度一次求解；否则每个季度一个任务"""
+    tasks = []
+    for t in teams:
+        groups = [t["quarters"]] if horizon else [[q] for q in t["quarters"]]
+        for quarters in groups:
+            request = ScheduleRequest(people=t["people"], year=t["year"], quarter=quarters[0],
+                                      quarters=quarters if horizon else [],
+                                      strategy=t["strategy"] or strategy,
+                                      seed=t["seed"] if t["seed"] is not None else seed, optimize=optimize,
+                                      group_sizes=tuple(t["group_sizes"] or group_sizes),
+                                      trips_per_day=t["trips_per_day"] or trips_per_day)
+            tasks.append((t["team"], t["year"], request.period_tag, request))
+    return tasks
+
+
+def _by_team(results, log, summary):
+    """按任务顺序汇总结果，每个团队的所有任务完成后产出一次 (团队, [EventStore, ...])"""
+    current_team, stores = None, []
+    for team, period, store, status, problems, seed, wall_time in results:
+        if team != current_team:
+            if stores:
+                yield current_team, stores
+            current_team, stores = team, []
+        stores.append(store)
+        unmet = sum(max(t - c, 0) for _, c, t in status)
+        if problems or unmet:
+            summary["failed"] += 1
+        mark = "❌" if problems else ("⚠️" if unmet else "✅")
+        log(f"{mark} {team} {period}: {len(store)} 条行程, 未完成 {unmet} 次, "
+            f"种子 {seed}, 耗时 {wall_time * 1000:.1f} ms")
+        for msg in problems:
+            log(f"     - {msg}")
+    if stores:
+        yield current_team, stores
+
+
+def _write_team(out_dir, team, stores, formats):
+    base = os.path.join(out_dir, safe_filename(team))
+    if "csv" in formats:
+        with open(f"{base}.csv", "wb") as f:
+            write_csv(f, stores, with_quarter=True)
+    if "xlsx" in formats:
+        with open(f"{base}.xlsx", "wb") as f:
+            write_xlsx(f, stores, with_quarter=True, sheet_name=team)
+    if "ics" in formats:
+        with open(f"{base}.ics", "wb") as f:
+            write_ics(f, stores, team)
+
+
+def run_batch(tasks, out_dir, workers=1, log=print, formats=("csv",), zip_path=None):
+    """
+    按任务顺序逐个写出结果：同一团队的多个季度写入同一组文件，一个团队的任务全部完成就写出并释放。
+    zip_path 不为空时所有团队写入同一个 zip（每个团队一个目录，含个人日历），不再写 out_dir。
+    返回 (任务数, 有未完成次数或预检失败的任务数)。
+    """
+    years = sorted({year for _, year, _, _ in tasks})
+    args = [list(x) for x in zip(*tasks)] if tasks else [[], [], [], []]
+
+    if workers > 1:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_warm_calendar, initargs=(years,))
+        results = pool.map(run_task, *args)
+    else:
+        pool = None
+        _warm_calendar(years)
+        results = map(run_task, *args)
+
+    summary = {"failed": 0}
+    teams = _by_team(results, log, summary)
+    try:
+        if zip_path:
+            with open(zip_path, "wb") as f:
+                write_zip(f, teams, formats)
+        else:
+            os.makedirs(out_dir, exist_ok=True)
+            for team, stores in teams:
+                _write_team(out_dir, team, stores, formats)
+    finally:
+        if pool:
+            pool.shutdown()
+    return len(tasks), summary["failed"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TripSync 批量排期（多部门 × 多季度）")
+    parser.add_argument("inputs", nargs="+", help="团队文件（.json / .csv）或包含它们的目录")
+    parser.add_argument("-o", "--output", default="schedules", help="输出目录")
+    parser.add_argument("--year", type=int, default=time.localtime().tm_year, help="团队文件未指定时使用的年份")
+    parser.add_argument("--quarters", default="1,2,3,4", help="团队文件未指定时排哪些季度，逗号分隔")
+    parser.add_argument("--strategy", default="exact", choices=["exact", "greedy", "heap"])
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=1, help="并行进程数")
+    parser.add_argument("--optimize", type=float, default=0.0, metavar="SECONDS", help="每个任务求解后做质量优化的秒数")
+    parser.add_argument("--group-sizes", default="2", help="团队文件未指定时允许的每组人数，逗号分隔，如 2,3（含 1 允许单人）")
+    parser.add_argument("--trips-per-day", type=int, default=0, help="分组模式下每天最多几组同时出差，0 表示按每日人数上限换算")
+    parser.add_argument("--horizon", action="store_true", help="每个团队的所有季度一次求解，次数为整个区间的总数")
+    parser.add_argument("--formats", default="csv", help=f"输出格式，逗号分隔：{','.join(FORMATS)}")
+    parser.add_argument("--zip", default=None, metavar="PATH", help="所有团队打包写入一个 zip（含每人的个人日历）")
+    args = parser.parse_args(argv)
+
+    formats = [x.strip() for x in args.formats.split(",") if x.strip()]
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        parser.error(f"未知的输出格式: {', '.join(sorted(unknown))}")
+
+    quarters = [int(q) for q in args.quarters.split(",")]
+    try:
+        teams = load_teams(args.inputs, args.year, quarters)
+    except TeamFileError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    tasks = build_tasks(teams, args.strategy, args.seed, horizon=args.horizon, optimize=args.optimize,
+                        group_sizes=tuple(int(x) for x in args.group_sizes.split(",")),
+                        trips_per_day=args.trips_per_day)
+    started = time.perf_counter()
+    total, failed = run_batch(tasks, args.output, workers=args.workers, formats=formats, zip_path=args.zip)
+    print(f"\n📦 共 {len(teams)} 个团队、{total} 个排期任务，{failed} 个未完全排满，"
+          f"总耗时 {time.perf_counter() - started:.2f} s，结果在 {args.zip or args.output + '/'}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
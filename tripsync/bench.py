@@ -0,0 +1,180 @@
+import argparse
+import datetime
+import json
+import math
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from tripsync.availability import DAY_CAPACITY
+from tripsync.solvers import SOLVERS, solve
+from tripsync.stats import SolverStats
+from tripsync.workdays import get_horizon_dates
+
+# ==========================================
+# 排期引擎基准测试
+# ==========================================
+# 生成不同规模的合成团队（人数、目标次数、黑名单密度、排期区间），
+# 对每种求解策略记录：耗时、迭代次数、未完成次数、峰值内存，以及实际执行的算法
+# （solver 列：精确求解在超过 LARGE_TEAM 人时改用堆驱动的贪心，找不到完整解时退回随机贪心）。
+# 输出 JSON Lines 或 CSV，便于长期跟踪性能回归。
+#
+#   python -m tripsync.bench                       # 默认矩阵
+#   python -m tripsync.bench --quick               # 小规模冒烟
+#   python -m tripsync.bench --format csv -o bench.csv
+#
+# --entry 选择使用哪组参数：
+#   app    : 引擎默认参数，即界面和命令行当前的设置（去掉季度首尾工作日，max_loops=5000，每日 4 人）
+#   cli    : 旧版 solve_schedule_v4 的参数（季度全部工作日，max_loops=2000，每日 4 人），便于与历史数据对比
+#   scaled : 与 app 相同，但每日容量按团队总需求放大，测大团队在"有解"时的求解速度（不是界面的真实设置）
+
+ENTRIES = {
+    "app": {"trim": True, "max_loops": 5000, "scale_capacity": False},
+    "cli": {"trim": False, "max_loops": 2000, "scale_capacity": False},
+    "scaled": {"trim": True, "max_loops": 5000, "scale_capacity": True},
+}
+
+FIELDS = ["entry", "strategy", "solver", "horizon", "people", "density", "capacity", "days", "target_total",
+          "seed", "wall_time", "iterations", "unmet", "peak_kb"]
+
+
+class _Person:
+    def __init__(self, name, target_count, blackout_dates):
+        self.name = name
+        self.target_count = target_count
+        self.current_count = 0
+        self.blackout_dates = blackout_dates
+
+
+def horizon_days(horizon, year, trim):
+    """quarter: 第 4 季度；year: 全年（与引擎的全年排期一致，每季度各自去掉首尾工作日）"""
+    return get_horizon_dates(year, [4] if horizon == "quarter" else [1, 2, 3, 4], trim)
+
+
+def make_team(size, density, days, rng, scale_capacity=False):
+    """
+    生成合成团队：每人目标次数为可排天数的 5%~25%，黑名单按 density 随机抽取。
+    scale_capacity 时每日容量按总需求放大 25% 取偶数，保证大团队在容量上有解；否则为默认的 4 人。
+    """
+    spec = []
+    for i in range(size):
+        blackout = set(rng.sample(days, int(len(days) * density)))
+        target = max(1, int(len(days) * rng.uniform(0.05, 0.25)))
+        spec.append((f"P{i:03d}", target, blackout))
+    total = sum(t for _, t, _ in spec)
+    capacity = DAY_CAPACITY
+    if scale_capacity:
+        capacity = max(DAY_CAPACITY, 2 * math.ceil(total * 1.25 / len(days) / 2))
+    return spec, capacity
+
+
+def solver_used(strategy, stats):
+    """solve() 实际执行的算法"""
+    if stats.get("exact_routed_heap"):
+        return "heap"
+    if stats.get("exact_fallback_greedy"):
+        return "exact+greedy"
+    return strategy
+
+
+def run_case(spec, days, strategy, capacity, seed, max_loops, measure_memory):
+    people = [_Person(*row) for row in spec]
+    stats = SolverStats()
+    if measure_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    solve(people, days, strategy=strategy, max_loops=max_loops, day_capacity=capacity, seed=seed, stats=stats)
+    wall = time.perf_counter() - start
+    peak = 0
+    if measure_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    unmet = sum(max(p.target_count - p.current_count, 0) for p in people)
+    return wall, stats.get("iterations"), unmet, peak, solver_used(strategy, stats)
+
+
+def run_benchmarks(sizes, densities, horizons, strategies, entry="app", repeat=3, seed=0, year=2025,
+                   memory=True):
+    """
+    逐个返回结果字典；耗时取 repeat 次（种子 seed, seed+1, ...）中的最小值，
+    迭代次数、未完成次数和实际执行的算法取报告的种子 seed 那一次，峰值内存单独用 seed 跑一次 tracemalloc
+    """
+    opts = ENTRIES[entry]
+    for horizon in horizons:
+        days = horizon_days(horizon, year, opts["trim"])
+        for size in sizes:
+            for density in densities:
+                rng = random.Random(f"{seed}-{horizon}-{size}-{density}")
+                spec, capacity = make_team(size, density, days, rng, opts["scale_capacity"])
+                for strategy in strategies:
+                    times = []
+                    for r in range(repeat):
+                        wall, its, short, _, ran = run_case(spec, days, strategy, capacity, seed + r,
+                                                            opts["max_loops"], False)
+                        times.append(wall)
+                        if r == 0:
+                            iterations, unmet, solver = its, short, ran
+                    peak = 0
+                    if memory:
+                        peak = run_case(spec, days, strategy, capacity, seed, opts["max_loops"], True)[3]
+                    yield {
+                        "entry": entry, "strategy": strategy, "solver": solver, "horizon": horizon, "people": size,
+                        "density": density, "capacity": capacity, "days": len(days),
+                        "target_total": sum(t for _, t, _ in spec), "seed": seed,
+                        "wall_time": round(min(times), 6), "iterations": iterations, "unmet": unmet,
+                        "peak_kb": round(peak / 1024, 1),
+                    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TripSync 排期引擎基准测试")
+    parser.add_argument("--sizes", default="5,20,50,100,200,500", help="团队人数，逗号分隔")
+    parser.add_argument("--densities", default="0,0.1,0.3", help="黑名单密度，逗号分隔")
+    parser.add_argument("--horizons", default="quarter,year", help="排期区间: quarter,year")
+    parser.add_argument("--strategies", default=",".join(SOLVERS), help="求解策略，逗号分隔")
+    parser.add_argument("--entry", default="app", choices=list(ENTRIES), help="模拟的入口参数")
+    parser.add_argument("--repeat", type=int, default=3, help="每个用例重复次数（耗时取最小值）")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--year", type=int, default=2025)
+    parser.add_argument("--no-memory", action="store_true", help="不测量峰值内存")
+    parser.add_argument("--quick", action="store_true", help="小规模冒烟测试")
+    parser.add_argument("--format", default="json", choices=["json", "csv"])
+    parser.add_argument("-o", "--output", help="输出文件，默认标准输出")
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        args.sizes, args.densities, args.horizons, args.repeat = "5,50", "0.1", "quarter", 1
+    rows = run_benchmarks(
+        sizes=[int(x) for x in args.sizes.split(",")],
+        densities=[float(x) for x in args.densities.split(",")],
+        horizons=args.horizons.split(","),
+        strategies=args.strategies.split(","),
+        entry=args.entry, repeat=args.repeat, seed=args.seed, year=args.year,
+        memory=not args.no_memory,
+    )
+
+    out = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    try:
+        if args.format == "csv":
+            import csv
+            writer = csv.DictWriter(out, fieldnames=FIELDS)
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+                out.flush()
+        else:
+            meta = {"meta": {"python": platform.python_version(), "platform": platform.platform(),
+                             "time": datetime.datetime.now().isoformat(timespec="seconds")}}
+            out.write(json.dumps(meta) + "\n")
+            for row in rows:
+                out.write(json.dumps(row) + "\n")
+                out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
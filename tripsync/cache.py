@@ -0,0 +1,100 @@
+import copy
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import asdict
+
+from tripsync.engine import request_days, schedule
+
+# ==========================================
+# 排期结果缓存
+# ==========================================
+# 以规范化后的输入（人员、次数、黑名单、年份、季度、策略、种子等）的哈希为键，
+# 缓存 schedule() 的结果。缓存在进程内共享：Streamlit 的所有会话、
+# 命令行批处理都能命中同一份热缓存。容量有限，按最近最少使用淘汰。
+
+
+def request_key(request):
+    """
+    请求的规范化哈希：季度统一成实际排期的 periods（设置了 quarters 时不再看 quarter），
+    黑名单只保留排期区间内的可排日期并去重排序，日期统一成 ISO 字符串
+    """
+    data = asdict(request)
+    del data["quarter"]
+    data["quarters"] = request.periods
+    days = set(request_days(request))
+    data["people"] = [
+        {"name": p["name"], "count": p["count"],
+         "blackout": sorted({d.isoformat() for d in p["blackout"] if d in days}),
+         "quarter_counts": {str(q): n for q, n in p["quarter_counts"].items() if n}}
+        for p in data["people"]
+    ]
+    raw = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """线程安全的 LRU 缓存"""
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+
+_default_cache = ResultCache()
+
+
+def get_default_cache():
+    """进程内共享的结果缓存（界面、任务池、本地服务共用）"""
+    return _default_cache
+
+
+def cached_schedule(request, cache=None, control=None):
+    """
+    带缓存的 schedule()。返回结果的浅拷贝（统计对象单独复制），
+    调用方在统计里追加导出耗时等信息不会污染缓存。
+    因超出时间预算而提前结束的结果不完整，不写入缓存。
+    """
+    cache = cache if cache is not None else _default_cache
+    key = request_key(request)
+    result = cache.get(key)
+    if result is None:
+        result = schedule(request, control=control)
+        if not result.stats.get("deadline_hit"):
+            cache.put(key, result)
+        hit = False
+    else:
+        hit = True
+    result = copy.copy(result)
+    result.stats = copy.deepcopy(result.stats)
+    if hit:
+        result.stats.count("cache_hit")
+    return result
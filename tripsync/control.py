@@ -0,0 +1,43 @@
+import threading
+import time
+
+# ==========================================
+# 求解过程控制：进度、取消、时间预算
+# ==========================================
+# 求解器在循环中调用 control.report(已安排, 总数)：
+#   - 记录进度，供界面轮询显示
+#   - 任务被取消时抛出 SolveCancelled，立即终止求解
+# 超出时间预算时 control.expired() 为真，求解器提前结束并返回已安排的部分结果。
+
+
+class SolveCancelled(Exception):
+    pass
+
+
+class SolveControl:
+
+    def __init__(self, time_budget=None):
+        self.done = 0
+        self.total = 0
+        self.deadline = time.perf_counter() + time_budget if time_budget else None
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def report(self, done, total):
+        self.done = done
+        self.total = total
+        if self._cancelled.is_set():
+            raise SolveCancelled()
+
+    def expired(self):
+        return self.deadline is not None and time.perf_counter() > self.deadline
+
+    @property
+    def fraction(self):
+        return min(self.done / self.total, 1.0) if self.total else 0.0
@@ -0,0 +1,275 @@
+import datetime
+import random
+import time
+from dataclasses import dataclass, field
+
+from tripsync.availability import DAY_CAPACITY
+from tripsync.events import EventStore, TripEvent
+from tripsync.feasibility import check_feasibility, check_group_feasibility
+from tripsync.multistart import solve_multistart
+from tripsync.optimize import ITERATIONS_PER_SECOND, Objective, optimize
+from tripsync.solvers import solve
+from tripsync.stats import SolverStats
+from tripsync.workdays import get_horizon_dates, quarter_of
+
+# ==========================================
+# 排期引擎（界面与命令行共用的统一入口）
+# ==========================================
+#   request = ScheduleRequest(people=[PersonSpec("张三", 10, [date, ...]), ...], year=2025, quarter=4)
+#   result = schedule(request)
+#   result.events / result.people / result.stats
+#
+# 多季度 / 全年排期：ScheduleRequest(..., quarters=[1, 2, 3, 4])，所有季度一次求解，
+# 每个季度仍各自去掉首尾工作日。PersonSpec.count 为整个区间的总次数；
+# 如需按季度的子目标，填 quarter_counts={1: 3, 2: 4}。
+#
+# 分组模式：ScheduleRequest(..., group_sizes=(2, 3), trips_per_day=3)，每组人数取自 group_sizes，
+# 每天最多 trips_per_day 组；默认的 (2,) 为原来的双人规则。
+
+__all__ = ["PersonSpec", "ScheduleRequest", "Person", "ScheduleResult", "Objective", "TripEvent",  # TripEvent 兼容旧代码
+           "parse_blackout", "request_days", "check", "schedule"]
+
+
+@dataclass
+class PersonSpec:
+    """输入：一个人的排期需求"""
+    name: str
+    count: int
+    blackout: list[datetime.date] = field(default_factory=list)
+    quarter_counts: dict[int, int] = field(default_factory=dict)   # 按季度的子目标（多季度排期时使用）
+
+    @property
+    def total(self):
+        return max(self.count, sum(self.quarter_counts.values()))
+
+
+@dataclass
+class ScheduleRequest:
+    """输入：人员、排期区间、约束、求解策略与时间预算"""
+    people: list[PersonSpec]
+    year: int
+    quarter: int
+    quarters: list[int] = field(default_factory=list)   # 多季度 / 全年排期，为空时只排 quarter
+    strategy: str = "exact"
+    trim_edges: bool = True          # 合规：去掉季度首尾两个工作日
+    day_capacity: int = DAY_CAPACITY
+    max_loops: int = 5000
+    time_budget: float = 2.0         # 精确求解的时间预算（秒）
+    attempts: int = 1                # >1 时多起点并行，取最优
+    seed: int | None = None
+    precheck: bool = True            # 先做可行性预检，明显排不满时直接返回原因
+    optimize: float = 0.0            # >0 时求解后再做约这么多秒的质量优化（按固定迭代次数换算，结果可复现）
+    objective: Objective = field(default_factory=Objective)
+    group_sizes: tuple[int, ...] = (2,)   # 允许的每组人数，含 1 表示允许单人出差
+    trips_per_day: int = 0           # 分组模式下每天最多几组同时出差，0 表示 day_capacity // 2
+
+    @property
+    def group_mode(self):
+        """是否使用分组模式（不是默认的双人规则）"""
+        return tuple(self.group_sizes) != (2,) or self.trips_per_day not in (0, self.day_capacity // 2)
+
+    @property
+    def day_trips(self):
+        return self.trips_per_day or self.day_capacity // 2
+
+    @property
+    def periods(self):
+        return sorted(set(self.quarters)) if self.quarters else [self.quarter]
+
+    @property
+    def period_tag(self):
+        """文件名和标题用：'Q4'、'Q1-Q4' 或 'Q1+Q3'"""
+        periods = self.periods
+        if len(periods) == 1:
+            return f"Q{periods[0]}"
+        if periods == list(range(periods[0], periods[-1] + 1)):
+            return f"Q{periods[0]}-Q{periods[-1]}"
+        return "+".join(f"Q{q}" for q in periods)
+
+    @property
+    def split_by_quarter(self):
+        """有人设置了季度子目标时，按季度依次求解"""
+        return len(self.periods) > 1 and any(p.quarter_counts for p in self.people)
+
+
+class Person:
+    """求解过程中的人员状态"""
+
+    def __init__(self, name, target_count, blackout_dates):
+        self.name = name
+        self.target_count = target_count
+        self.current_count = 0
+        self.blackout_dates = set(blackout_dates)
+
+    def remaining(self):
+        return self.target_count - self.current_count
+
+    @property
+    def status(self):
+        if self.current_count >= self.target_count:
+            return "✅ 完成"
+        return f"⚠️ 缺 {self.remaining()} 次"
+
+
+@dataclass
+class ScheduleResult:
+    """输出：按日期排序的行程（按列存储）、每人完成情况、预检问题与统计数据（分阶段耗时、计数器）"""
+    store: EventStore
+    people: list[Person]
+    seed: int
+    problems: list[str] = field(default_factory=list)
+    stats: SolverStats = field(default_factory=SolverStats)
+    wall_time: float = 0.0
+    seeds: dict[int, int] = field(default_factory=dict)   # 逐季度求解时每个季度实际采用（多起点时为最优）的种子
+
+    @property
+    def events(self):
+        """逐条的 TripEvent 列表，首次访问时才创建"""
+        return self.store.events()
+
+    @property
+    def unmet(self):
+        return sum(max(p.remaining(), 0) for p in self.people)
+
+    def counts_by_quarter(self):
+        """每人每季度实际出差次数（按天计，与 current_count 一致）：{姓名: {季度: 次数}}"""
+        counts = {p.name: {} for p in self.people}
+        for name, ordinals in self.store.person_days().items():
+            for o in ordinals:
+                q = quarter_of(datetime.date.fromordinal(o))
+                counts[name][q] = counts[name].get(q, 0) + 1
+        return counts
+
+
+def parse_blackout(year, date_strs):
+    """把 'MM-DD'（属于 year 年）或 'YYYY-MM-DD' 字符串列表解析成日期，无法解析的条目忽略"""
+    dates = []
+    for s in date_strs:
+        try:
+            parts = list(map(int, s.strip().split('-')))
+            if len(parts) == 3:
+                dates.append(datetime.date(*parts))
+            else:
+                m, d = parts
+                dates.append(datetime.date(year, m, d))
+        except ValueError:
+            pass
+    return dates
+
+
+def request_days(request):
+    return get_horizon_dates(request.year, request.periods, request.trim_edges)
+
+
+def _make_people(request):
+    return [Person(p.name, p.total, p.blackout) for p in request.people]
+
+
+def _quarter_targets(request, people, workdays):
+    """
+    按季度拆分目标：子目标必须在该季度完成，其余次数（总次数减去子目标之和）
+    按剩余季度的可排天数比例分摊；前面季度没排满的次数会顺延到后面的季度。
+    生成器：每次产出 (季度, 该季度工作日, 该季度目标)，调用方在两次迭代之间更新 current_count。
+    """
+    periods = request.periods
+    days_by_q = {q: [d for d in workdays if quarter_of(d) == q] for q in periods}
+    fixed_left = [sum(p.quarter_counts.get(q, 0) for q in periods) for p in request.people]
+    for idx, q in enumerate(periods):
+        days_left = sum(len(days_by_q[r]) for r in periods[idx:])
+        share = len(days_by_q[q]) / days_left if days_left else 1.0
+        targets = []
+        for i, (spec, person) in enumerate(zip(request.people, people)):
+            fixed = spec.quarter_counts.get(q, 0)
+            fixed_left[i] -= fixed
+            flex_left = max(person.remaining() - fixed - fixed_left[i], 0)
+            flex = flex_left if idx == len(periods) - 1 else round(flex_left * share)
+            targets.append(fixed + flex)
+        yield q, days_by_q[q], targets
+
+
+def _feasibility(request, people, workdays):
+    if request.group_mode:
+        return check_group_feasibility(people, workdays, request.group_sizes, request.day_trips)
+    max_solo = len(request.periods) if request.split_by_quarter else 1
+    return check_feasibility(people, workdays, request.day_capacity, max_solo)
+
+
+def _precheck(request, people, workdays):
+    # 逐季度求解时，季度目标只是按比例的拆分，没排满的次数会顺延到后面的季度，
+    # 不能按季度逐个预检（会误拒本来能排满的请求）。这里把全部总次数放到整个区间上检查：
+    # 整段区间都排不满，逐季度求解更不可能排满
+    return _feasibility(request, people, workdays)
+
+
+def check(request):
+    """只做可行性预检，返回问题列表"""
+    return _precheck(request, _make_people(request), request_days(request))
+
+
+def _solve(request, people, workdays, seed, stats, control):
+    options = dict(max_loops=request.max_loops, time_budget=request.time_budget, day_capacity=request.day_capacity)
+    if request.group_mode:
+        options.update(group_sizes=tuple(request.group_sizes), trips_per_day=request.day_trips)
+    if request.attempts > 1:
+        placements, seed, _ = solve_multistart(list(people), workdays, attempts=request.attempts, seed=seed,
+                                               strategy=request.strategy, stats=stats, control=control, **options)
+    else:
+        # 贪心算法会打乱传入列表的顺序，传副本以保持输入顺序
+        placements = solve(list(people), workdays, strategy=request.strategy, seed=seed, stats=stats,
+                           control=control, **options)
+    if request.optimize > 0 and request.group_mode:
+        stats.count("optimize_skipped")   # 局部搜索的邻域操作按双人规则设计，分组模式不做优化
+    elif request.optimize > 0:
+        # 按迭代次数而不是墙钟时间停止，同一个种子总能复现同一份结果
+        placements = optimize(people, workdays, placements,
+                              max_iterations=int(request.optimize * ITERATIONS_PER_SECOND),
+                              objective=request.objective, day_capacity=request.day_capacity,
+                              rng=random.Random(seed), stats=stats, control=control)
+    return placements, seed
+
+
+def _solve_by_quarter(request, people, workdays, seed, stats, control):
+    """
+    逐季度求解（有季度子目标时），每个季度的实际次数累加回总人员状态。
+    第 idx 个季度以 seed + idx 起步，返回 (placements, seed, {季度: 该季度实际采用的种子})。
+    """
+    placements = []
+    seeds = {}
+    for idx, (q, days, targets) in enumerate(_quarter_targets(request, people, workdays)):
+        sub = [Person(p.name, t, p.blackout_dates) for p, t in zip(people, targets)]
+        with stats.phase(f"Q{q}"):
+            part, seeds[q] = _solve(request, sub, days, (seed + idx) % 2 ** 32, stats, control)
+        placements += part
+        for spec, person, s in zip(request.people, people, sub):
+            person.current_count += s.current_count
+            if s.current_count < spec.quarter_counts.get(q, 0):
+                # 季度子目标没排满，差额顺延到后面的季度
+                stats.count("quarter_shortfall")
+    return placements, seed, seeds
+
+
+def schedule(request, control=None):
+    """按请求排期；control（SolveControl）可选，用于进度汇报、取消与总时间预算"""
+    started = time.perf_counter()
+    stats = SolverStats()
+    with stats.phase("calendar"):
+        workdays = request_days(request)
+    people = _make_people(request)
+    seed = request.seed if request.seed is not None else random.randrange(2 ** 32)
+
+    if request.precheck:
+        with stats.phase("precheck"):
+            problems = _precheck(request, people, workdays)
+        if problems:
+            return ScheduleResult(EventStore(), people, seed, problems, stats, time.perf_counter() - started)
+
+    seeds = {}
+    if request.split_by_quarter:
+        # 多起点时各季度的最优种子各不相同，原种子配合同样的尝试次数才能复现
+        placements, seed, seeds = _solve_by_quarter(request, people, workdays, seed, stats, control)
+    else:
+        placements, seed = _solve(request, people, workdays, seed, stats, control)
+
+    with stats.phase("events"):
+        store = EventStore.from_placements(placements)
+    return ScheduleResult(store, people, seed, [], stats, time.perf_counter() - started, seeds)
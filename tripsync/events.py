@@ -0,0 +1,219 @@
+import datetime
+from array import array
+
+from tripsync.workdays import get_calendar, get_next_workday, get_prev_workday
+
+# ==========================================
+# 按列存储的行程表
+# ==========================================
+# 大团队、全年排期会产生上万条行程。逐条创建 TripEvent、每条都 strftime
+# 五六次再拼成字典，最后 pd.DataFrame 再复制一遍，开销主要花在对象和字符串上。
+# 这里把行程存成几列紧凑数组：
+#   start / reimburse / approval : 日期序数（date.toordinal()）
+#   days                         : 天数
+#   groups                       : 人员组合编号，组合表 group_table[g] 为人员编号元组
+# 输出时每个不同的日期、每个不同的人员组合只格式化一次，再按列查表展开，
+# 表格和 CSV 直接由这些列生成。需要逐条对象时 events() 才创建 TripEvent
+# （TripEvent 使用 __slots__，不再为每个实例分配 __dict__）。
+
+# 与 TripEvent.to_dict / to_csv_row 的字段一致
+TABLE_COLUMNS = ["开始日期", "结束日期", "日期显示", "天数", "出差人员", "审批日期(前)", "报销日期(后)"]
+CSV_HEADER = ["出差日期", "天数", "出差人员", "审批日期(建议)", "报销日期(建议)"]
+
+
+class TripEvent:
+    """表示一次出差事件"""
+
+    __slots__ = ("start_date", "end_date", "partners", "days_count", "approval_date", "reimburse_date")
+
+    def __init__(self, start_date, end_date, partners, approval_date=None, reimburse_date=None):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.partners = partners  # 出差人员名单
+        self.days_count = (end_date - start_date).days + 1
+
+        # 自动计算关联日期（由 EventStore 创建时已查表算好，直接传入）
+        self.approval_date = approval_date or get_prev_workday(start_date)
+        self.reimburse_date = reimburse_date or get_next_workday(end_date)
+
+    def to_dict(self):
+        """界面表格使用的一行数据"""
+        return {
+            "开始日期": self.start_date,
+            "结束日期": self.end_date,
+            "日期显示": f"{self.start_date.strftime('%m-%d')} ~ {self.end_date.strftime('%m-%d')}" if self.days_count > 1 else f"{self.start_date.strftime('%m-%d')}",
+            "天数": self.days_count,
+            "出差人员": " & ".join(self.partners),
+            "审批日期(前)": self.approval_date.strftime('%Y-%m-%d'),
+            "报销日期(后)": self.reimburse_date.strftime('%Y-%m-%d')
+        }
+
+    def to_csv_row(self):
+        """转为CSV行数据"""
+        date_str = f"{self.start_date.strftime('%Y/%m/%d')}"
+        if self.days_count > 1:
+            date_str += f"-{self.end_date.strftime('%m/%d')}"
+
+        names = ",".join(self.partners)
+        return [
+            date_str,
+            self.days_count,
+            names,
+            self.approval_date.strftime('%Y/%m/%d'),
+            self.reimburse_date.strftime('%Y/%m/%d')
+        ]
+
+
+class EventStore:
+    """按列存储的行程表，行按开始日期排序"""
+
+    __slots__ = ("start", "days", "approval", "reimburse", "groups", "group_table", "names", "_events")
+
+    def __init__(self):
+        self.names = []                    # 人员编号 -> 姓名
+        self.group_table = []              # 组合编号 -> 人员编号元组
+        self.start = array('l')
+        self.days = array('B')
+        self.approval = array('l')
+        self.reimburse = array('l')
+        self.groups = array('L')
+        self._events = None
+
+    @classmethod
+    def from_placements(cls, placements):
+        """由求解器的 (开始日期, 结束日期, [姓名]) 列表生成，按开始日期排序"""
+        store = cls()
+        if not placements:
+            return store
+        ids = {}
+        group_ids = {}
+        rows = sorted(placements, key=lambda x: x[0])
+        starts = [p[0].toordinal() for p in rows]
+        ends = [p[1].toordinal() for p in rows]
+        first = datetime.date.fromordinal(min(starts)).year
+        last = datetime.date.fromordinal(max(ends)).year
+        cal = get_calendar(first, last)
+        origin, size, prev_offset, next_offset = cal.origin, cal.size, cal.prev_offset, cal.next_offset
+        for (start, end, partners), s, e in zip(rows, starts, ends):
+            store.start.append(s)
+            store.days.append(e - s + 1)
+            # 直接查日历的偏移表，超出索引范围时才退回逐天查找
+            i, j = s - origin, e - origin
+            store.approval.append(s - prev_offset[i] if 0 <= i < size and prev_offset[i]
+                                  else cal.prev_workday(start).toordinal())
+            store.reimburse.append(e + next_offset[j] if 0 <= j < size and next_offset[j]
+                                   else cal.next_workday(end).toordinal())
+            key = tuple(partners)
+            g = group_ids.get(key)
+            if g is None:
+                for name in key:
+                    if name not in ids:
+                        ids[name] = len(store.names)
+                        store.names.append(name)
+                g = group_ids[key] = len(store.group_table)
+                store.group_table.append(tuple(ids[name] for name in key))
+            store.groups.append(g)
+        return store
+
+    @classmethod
+    def from_events(cls, events):
+        return cls.from_placements([(e.start_date, e.end_date, e.partners) for e in events])
+
+    def __len__(self):
+        return len(self.start)
+
+    def group(self, i):
+        """第 i 条行程的人员编号"""
+        return self.group_table[self.groups[i]]
+
+    def partners(self, i):
+        return [self.names[k] for k in self.group(i)]
+
+    def placements(self):
+        fromordinal = datetime.date.fromordinal
+        return [(fromordinal(s), fromordinal(s + d - 1), self.partners(i))
+                for i, (s, d) in enumerate(zip(self.start, self.days))]
+
+    def events(self):
+        """逐条的 TripEvent 列表（首次访问时创建并缓存）"""
+        if self._events is None:
+            fromordinal = datetime.date.fromordinal
+            self._events = [
+                TripEvent(fromordinal(s), fromordinal(s + d - 1), self.partners(i), fromordinal(a), fromordinal(r))
+                for i, (s, d, a, r) in enumerate(zip(self.start, self.days, self.approval, self.reimburse))]
+        return self._events
+
+    def person_days(self):
+        """每人每个出差日的序数：{姓名: [序数, ...]}"""
+        result = {name: [] for name in self.names}
+        for i, (s, d) in enumerate(zip(self.start, self.days)):
+            for k in self.group(i):
+                result[self.names[k]].extend(range(s, s + d))
+        return result
+
+    # --- 按列输出 ---
+
+    def _format(self, fmt, ordinals):
+        """每个不同的日期只格式化一次"""
+        f = _DateFormat(fmt)
+        return [f(o) for o in ordinals]
+
+    def _joined(self, sep):
+        """每个人员组合只拼接一次"""
+        joined = [sep.join(self.names[k] for k in members) for members in self.group_table]
+        return [joined[g] for g in self.groups]
+
+    def ends(self):
+        return array('l', (s + d - 1 for s, d in zip(self.start, self.days)))
+
+    def table_columns(self):
+        """界面表格的各列（列名见 TABLE_COLUMNS）"""
+        fromordinal = datetime.date.fromordinal
+        ends = self.ends()
+        start_md = self._format('%m-%d', self.start)
+        end_md = self._format('%m-%d', ends)
+        display = [f"{a} ~ {b}" if d > 1 else a for a, b, d in zip(start_md, end_md, self.days)]
+        return {
+            "开始日期": [fromordinal(o) for o in self.start],
+            "结束日期": [fromordinal(o) for o in ends],
+            "日期显示": display,
+            "天数": list(self.days),
+            "出差人员": self._joined(" & "),
+            "审批日期(前)": self._format('%Y-%m-%d', self.approval),
+            "报销日期(后)": self._format('%Y-%m-%d', self.reimburse),
+        }
+
+    def csv_rows(self):
+        """逐行生成导出数据（列名见 CSV_HEADER，格式与 TripEvent.to_csv_row 一致），不一次生成整张表"""
+        ymd, md = _DateFormat('%Y/%m/%d'), _DateFormat('%m/%d')
+        joined = [",".join(self.names[k] for k in members) for members in self.group_table]
+        for s, d, a, r, g in zip(self.start, self.days, self.approval, self.reimburse, self.groups):
+            date_str = f"{ymd(s)}-{md(s + d - 1)}" if d > 1 else ymd(s)
+            yield [date_str, d, joined[g], ymd(a), ymd(r)]
+
+    def records(self):
+        """逐条的 JSON 友好字典（日期为 ISO 字符串），本地排期服务返回给调用方"""
+        iso = _DateFormat('%Y-%m-%d')
+        members = [[self.names[k] for k in g] for g in self.group_table]
+        return [{"start": iso(s), "end": iso(s + d - 1), "days": d, "people": members[g],
+                 "approval": iso(a), "reimburse": iso(r)}
+                for s, d, a, r, g in zip(self.start, self.days, self.approval, self.reimburse, self.groups)]
+
+    def to_frame(self):
+        """界面用的 DataFrame（按需导入 pandas，命令行与批处理不依赖它）"""
+        import pandas as pd
+        return pd.DataFrame(self.table_columns(), columns=TABLE_COLUMNS)
+
+
+class _DateFormat:
+    """按日期序数缓存 strftime 结果"""
+
+    def __init__(self, fmt):
+        self.fmt = fmt
+        self.cache = {}
+
+    def __call__(self, ordinal):
+        text = self.cache.get(ordinal)
+        if text is None:
+            text = self.cache[ordinal] = datetime.date.fromordinal(ordinal).strftime(self.fmt)
+        return text
@@ -0,0 +1,272 @@
+import csv
+import datetime
+import hashlib
+import io
+import re
+import zipfile
+from xml.sax.saxutils import escape, quoteattr
+
+from tripsync.events import CSV_HEADER, EventStore
+from tripsync.workdays import quarter_of
+
+# ==========================================
+# 导出：CSV / Excel (xlsx) / 日历 (ics) / 批量 zip
+# ==========================================
+# 所有导出都直接从 EventStore 逐行写入文件对象（二进制），不先拼出整张表：
+#   with open("排期.xlsx", "wb") as f:
+#       write_xlsx(f, result.store)
+#   data = export_bytes("ics", result.store, name="研发部")   # 界面下载按钮使用
+#   write_zip(f, [("研发部", [store_q1, store_q2]), ...])       # 多个团队打包
+# stores 参数可以是单个 EventStore，也可以是多个（如同一团队的各季度结果），按顺序写出。
+# xlsx 用标准库 zipfile 直接写 Office Open XML，不依赖 openpyxl。
+
+FORMATS = ("csv", "xlsx", "ics")
+MIME_TYPES = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "ics": "text/calendar",
+    "zip": "application/zip",
+}
+
+
+def _stores(stores):
+    return [stores] if isinstance(stores, EventStore) else list(stores)
+
+
+def iter_rows(stores, with_quarter=False):
+    """逐行生成导出数据；with_quarter 时第一列为所在季度"""
+    for store in _stores(stores):
+        for s, row in zip(store.start, store.csv_rows()):
+            if with_quarter:
+                row.insert(0, f"Q{quarter_of(datetime.date.fromordinal(s))}")
+            yield row
+
+
+def header(with_quarter=False):
+    return ["季度"] + CSV_HEADER if with_quarter else list(CSV_HEADER)
+
+
+# --- CSV ---
+
+def write_csv(f, stores, with_quarter=False):
+    """UTF-8 带 BOM，Excel 可以直接打开"""
+    text = io.TextIOWrapper(f, encoding="utf-8-sig", newline="")
+    writer = csv.writer(text)
+    writer.writerow(header(with_quarter))
+    for row in iter_rows(stores, with_quarter):
+        writer.writerow(row)
+    text.flush()
+    text.detach()
+
+
+# --- Excel ---
+
+_XLSX_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+        'Target="styles.xml"/>'
+        '</Relationships>'),
+    "xl/styles.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+        '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+        '<fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        '</styleSheet>'),
+}
+
+
+def _xlsx_row(r, values, style=""):
+    cells = []
+    for v in values:
+        if isinstance(v, int):
+            cells.append(f'<c{style}><v>{v}</v></c>')
+        else:
+            cells.append(f'<c t="inlineStr"{style}><is><t>{escape(str(v))}</t></is></c>')
+    return f'<row r="{r}">{"".join(cells)}</row>'
+
+
+def _sheet_name(name, default="排期"):
+    """Excel 工作表名不能含 [ ] : * ? / \\，不能以单引号开头或结尾、不能为空，最长 31 个字符"""
+    name = re.sub(r"[\[\]:*?/\\]", "", name).strip(" '")
+    return name[:31].rstrip(" '") or default
+
+
+def write_xlsx(f, stores, with_quarter=False, sheet_name="排期表"):
+    """单工作表的 xlsx，工作表内容逐行写入压缩流"""
+    with zipfile.ZipFile(f, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, xml in _XLSX_PARTS.items():
+            zf.writestr(name, xml)
+        zf.writestr("xl/workbook.xml", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets><sheet name={quoteattr(_sheet_name(sheet_name))} sheetId="1" r:id="rId1"/></sheets>'
+            '</workbook>'))
+        with zf.open("xl/worksheets/sheet1.xml", "w") as sheet:
+            sheet.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                '<sheetData>').encode("utf-8"))
+            sheet.write(_xlsx_row(1, header(with_quarter), ' s="1"').encode("utf-8"))
+            for r, row in enumerate(iter_rows(stores, with_quarter), start=2):
+                sheet.write(_xlsx_row(r, row).encode("utf-8"))
+            sheet.write(b'</sheetData></worksheet>')
+
+
+# --- 日历 (iCalendar, RFC 5545) ---
+
+def _ics_text(value):
+    return value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def _ics_line(line):
+    """超过 75 字节的行按 RFC 5545 折行（不拆开多字节字符）"""
+    data = line.encode("utf-8")
+    if len(data) <= 75:
+        return data + b"\r\n"
+    parts, current, limit = [], b"", 75
+    for ch in line:
+        b = ch.encode("utf-8")
+        if len(current) + len(b) > limit:
+            parts.append(current)
+            current, limit = b"", 74   # 续行以一个空格开头
+        current += b
+    parts.append(current)
+    return b"\r\n ".join(parts) + b"\r\n"
+
+
+def _ics_event(uid, stamp, day, end, summary, description):
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{uid}",
+        f"DTSTAMP:{stamp}",
+        f"DTSTART;VALUE=DATE:{day:%Y%m%d}",
+        f"DTEND;VALUE=DATE:{end + datetime.timedelta(days=1):%Y%m%d}",
+        f"SUMMARY:{_ics_text(summary)}",
+        f"DESCRIPTION:{_ics_text(description)}",
+        "TRANSP:TRANSPARENT",
+        "END:VEVENT",
+    ]
+    return b"".join(_ics_line(x) for x in lines)
+
+
+def write_ics(f, stores, name="", person=None):
+    """
+    行程、审批日、报销日各生成一个全天事件。person 为姓名时只导出此人参与的行程（个人日历），
+    否则导出全部行程（团队日历）。
+    """
+    stamp = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    title = name if person is None else f"{name} {person}".strip()
+    f.write(b"".join(_ics_line(x) for x in [
+        "BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//TripSync//差旅排期//ZH", "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH", f"X-WR-CALNAME:{_ics_text(title or '差旅排期')}"]))
+    fromordinal = datetime.date.fromordinal
+    # UID 带上团队名的摘要：多个团队的日历导入同一个日历客户端时不会互相覆盖
+    team = hashlib.sha1(name.encode("utf-8")).hexdigest()[:10]
+    for n, store in enumerate(_stores(stores)):
+        pid = store.names.index(person) if person in store.names else -1
+        for i, (s, d, a, r, g) in enumerate(zip(store.start, store.days, store.approval, store.reimburse,
+                                               store.groups)):
+            if person is not None and pid not in store.group_table[g]:
+                continue
+            start, end = fromordinal(s), fromordinal(s + d - 1)
+            names = "、".join(store.names[k] for k in store.group_table[g])
+            uid = f"{team}-{s}-{n}-{i}"
+            trip = f"{start:%m-%d}" + (f" ~ {end:%m-%d}" if d > 1 else "")
+            f.write(_ics_event(f"trip-{uid}@tripsync", stamp, start, end, f"出差：{names}",
+                               f"出差 {d} 天（{trip}）\n人员：{names}"))
+            f.write(_ics_event(f"approval-{uid}@tripsync", stamp, fromordinal(a), fromordinal(a),
+                               f"出差审批：{names}", f"{trip} 出差的审批日（建议）"))
+            f.write(_ics_event(f"reimburse-{uid}@tripsync", stamp, fromordinal(r), fromordinal(r),
+                               f"出差报销：{names}", f"{trip} 出差的报销日（建议）"))
+    f.write(_ics_line("END:VCALENDAR"))
+
+
+# --- 汇总 ---
+
+def export_bytes(fmt, stores, name="", with_quarter=False):
+    """导出为内存中的字节串（界面下载按钮使用）"""
+    buf = io.BytesIO()
+    if fmt == "csv":
+        write_csv(buf, stores, with_quarter)
+    elif fmt == "xlsx":
+        write_xlsx(buf, stores, with_quarter)
+    elif fmt == "ics":
+        write_ics(buf, stores, name)
+    else:
+        raise ValueError(f"未知的导出格式: {fmt}")
+    return buf.getvalue()
+
+
+def safe_filename(name):
+    return re.sub(r'[\\/:*?"<>|\s]+', "_", name).strip("._") or "未命名"
+
+
+def _unique(name, used):
+    """不同姓名可能映射成同一个文件名（如 "张 三" 与 "张_三"），重名时加序号（不区分大小写）"""
+    candidate, n = name, 1
+    while candidate.lower() in used:
+        n += 1
+        candidate = f"{name}_{n}"
+    used.add(candidate.lower())
+    return candidate
+
+
+def write_zip(f, teams, formats=FORMATS, per_person=True, with_quarter=True):
+    """
+    teams 为 (团队名, stores) 序列，每个团队一个目录：
+      团队/排期表.csv  团队/排期表.xlsx  团队/团队日历.ics  团队/个人日历/姓名.ics
+    每个成员文件依次流式写入 zip，同一时间只打开一个成员。
+    """
+    folders = set()
+    with zipfile.ZipFile(f, "w", zipfile.ZIP_DEFLATED) as zf:
+        for team, stores in teams:
+            stores = _stores(stores)
+            folder = _unique(safe_filename(team), folders)
+            if "csv" in formats:
+                with zf.open(f"{folder}/排期表.csv", "w") as member:
+                    write_csv(member, stores, with_quarter)
+            if "xlsx" in formats:
+                with zf.open(f"{folder}/排期表.xlsx", "w") as member:
+                    write_xlsx(member, stores, with_quarter, sheet_name=team)
+            if "ics" in formats:
+                with zf.open(f"{folder}/团队日历.ics", "w") as member:
+                    write_ics(member, stores, team)
+                if per_person:
+                    people = dict.fromkeys(n for s in stores for n in s.names)
+                    used = set()
+                    for person in people:
+                        with zf.open(f"{folder}/个人日历/{_unique(safe_filename(person), used)}.ics", "w") as member:
+                            write_ics(member, stores, team, person=person)
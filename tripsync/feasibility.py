@@ -0,0 +1,100 @@
+# ==========================================
+# 可行性预检
+# ==========================================
+# 在真正排期之前，用几个很便宜的上界快速判断目标次数是否可能达成。
+# 这里只做必要条件检查：报告了问题就一定排不满；没报告问题则交给求解器。
+
+import math
+
+from tripsync.availability import DAY_CAPACITY, Availability
+
+
+def check_feasibility(people, workdays, day_capacity=DAY_CAPACITY, max_solo=1):
+    """
+    返回问题列表（中文说明），空列表表示没有发现不可行的约束。
+    people 需要有 name / target_count / blackout_dates。
+    max_solo 为最多允许的单人出差次数（逐季度求解时每个季度各可有一次）。
+    """
+    problems = []
+    grid = Availability(people, workdays, day_capacity)
+    avail = grid.avail
+    total = sum(p.target_count for p in people)
+    # 双人行程贡献偶数次，单人出差次数必须与总次数同奇偶：取不超过 max_solo 的、奇偶相同的最大值
+    if total % 2:
+        solo = max_solo if max_solo % 2 else max_solo - 1
+    else:
+        solo = max_solo - max_solo % 2
+
+    # 1. 个人容量：目标次数不能超过自己可出差的天数
+    for i, p in enumerate(people):
+        cap = avail[i].bit_count()
+        if p.target_count > cap:
+            problems.append(f"{p.name} 目标 {p.target_count} 次，但排除黑名单后只有 {cap} 个可出差日")
+
+    # 2. 搭档容量：双人出差需要搭档，与每位搭档的共同可用天数有限
+    for i, p in enumerate(people):
+        if p.target_count <= 0:
+            continue
+        partner_cap = sum(min(q.target_count, (avail[i] & avail[j]).bit_count())
+                          for j, q in enumerate(people) if j != i)
+        if p.target_count > partner_cap + solo:
+            problems.append(f"{p.name} 目标 {p.target_count} 次，但与其他人的共同可用日最多只能凑出 "
+                            f"{partner_cap + solo} 次")
+
+    # 3. 每日容量：每天最多 day_capacity 人，且当天可出差人数必须成对
+    needy = [avail[i] for i, p in enumerate(people) if p.target_count > 0]
+    day_cap = 0
+    for k in range(len(grid.days)):
+        free = sum((mask >> k) & 1 for mask in needy)
+        day_cap += min(day_capacity - day_capacity % 2, free - free % 2)
+    if total > day_cap + solo:
+        problems.append(f"总目标 {total} 次超过全部工作日的容量上限 {day_cap + solo} 次")
+
+    # 4. 奇数总额需要一次单人出差
+    if solo and not any(p.target_count > 0 and avail[i] for i, p in enumerate(people)):
+        problems.append(f"总目标 {total} 次为奇数，但没有可以安排单人出差的日期")
+
+    return problems
+
+
+def check_group_feasibility(people, workdays, group_sizes, trips_per_day):
+    """分组模式的预检（每组人数取自 group_sizes，每天最多 trips_per_day 组），返回问题列表"""
+    problems = []
+    grid = Availability(people, workdays)
+    avail = grid.avail
+    total = sum(p.target_count for p in people)
+    sizes = sorted(s for s in set(group_sizes) if s > 0)
+    if not sizes or trips_per_day <= 0:
+        return ["没有可用的分组人数或每天的行程组数为 0"] if total else []
+
+    for i, p in enumerate(people):
+        cap = avail[i].bit_count()
+        if p.target_count > cap:
+            problems.append(f"{p.name} 目标 {p.target_count} 次，但排除黑名单后只有 {cap} 个可出差日")
+
+    # 不允许单人出差时，每次出差都至少需要一位同行的人
+    if sizes[0] > 1:
+        for i, p in enumerate(people):
+            if p.target_count <= 0:
+                continue
+            partner_cap = sum(min(q.target_count, (avail[i] & avail[j]).bit_count())
+                              for j, q in enumerate(people) if j != i)
+            if p.target_count > partner_cap:
+                problems.append(f"{p.name} 目标 {p.target_count} 次，但与其他人的共同可用日最多只能凑出 "
+                                f"{partner_cap} 次")
+
+    # 每日容量：最多 trips_per_day 组、每组最多 sizes[-1] 人，可出差人数不足最小组时当天排不了
+    needy = [avail[i] for i, p in enumerate(people) if p.target_count > 0]
+    day_cap = 0
+    for k in range(len(grid.days)):
+        free = sum((mask >> k) & 1 for mask in needy)
+        if free >= sizes[0]:
+            day_cap += min(trips_per_day * sizes[-1], free)
+    if total > day_cap:
+        problems.append(f"总目标 {total} 次超过全部工作日的容量上限 {day_cap} 次")
+
+    # 总次数必须能拆成若干组：例如只允许三人一组时，总次数必须是 3 的倍数
+    step = math.gcd(*sizes)
+    if total % step:
+        problems.append(f"总目标 {total} 次不是 {step} 的倍数，无法全部按 {'/'.join(map(str, sizes))} 人一组安排")
+    return problems
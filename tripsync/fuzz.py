@@ -0,0 +1,222 @@
+import argparse
+import dataclasses
+import datetime
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from tripsync.engine import PersonSpec, ScheduleRequest, request_days, schedule
+from tripsync.repair import ScheduleDelta, repair
+from tripsync.verify import verify
+from tripsync.workdays import check_year_support
+
+# ==========================================
+# 随机排期测试（fuzz）
+# ==========================================
+# 随机生成大量团队配置（人数、次数、黑名单、季度 / 全年、算法、分组模式、是否去掉首尾工作日、
+# 多起点尝试次数、质量优化，偶尔再做一次请假重排），调用 engine.schedule 排期，再用 verify 独立校验结果。
+# 预检判定排不满的用例也关掉预检再求解一次：求解器反而排满了，说明预检误判，同样算失败。
+# 命令行 main.py（solve_schedule_v4）、批量排期和页面都只是 schedule 的外壳，
+# 校验 schedule 就覆盖了它们共用的求解逻辑；修改求解器之后跑几分钟即可大规模回归。
+#
+# 每个用例只由 (总种子, 序号) 决定，可以单独复现；校验不通过（或抛出异常）的用例
+# 写成团队 JSON 存到 --out 目录，附带完整的请求参数，可用 --replay 重新运行，
+# 也可以直接交给 python -m tripsync.batch（多季度用例加 --horizon）。
+#
+#   python -m tripsync.fuzz --minutes 1 --workers 8
+#   python -m tripsync.fuzz --cases 20000 --seed 7
+#   python -m tripsync.fuzz --replay fuzz-failures/case-7-123.json
+
+CHUNK = 200   # 每个子进程任务包含的用例数
+
+
+def _blackout(rng, days, n):
+    return sorted(rng.sample(days, min(n, len(days))))
+
+
+def make_case(seed, index):
+    """由 (seed, index) 生成一个随机用例，返回 (请求参数字典, 是否做请假重排)"""
+    rng = random.Random(seed * 1_000_003 + index)
+    years = [y for y in range(2021, 2027) if check_year_support(y)]
+    year = rng.choice(years)
+    if rng.random() < 0.25:
+        quarters = sorted(rng.sample([1, 2, 3, 4], rng.randint(2, 4)))
+    else:
+        quarters = [rng.randint(1, 4)]
+    trim = rng.random() < 0.8
+    if 4 in quarters and not check_year_support(year + 1):
+        trim = True   # 不去掉首尾时 12-31 的行程要到下一年报销，下一年没有节假日数据无法排期
+    days = request_days(ScheduleRequest([], year, quarters[0], quarters=quarters, trim_edges=trim))
+
+    group_sizes, trips_per_day = (2,), 0
+    if rng.random() < 0.3:
+        group_sizes = tuple(sorted(rng.sample([1, 2, 3, 4], rng.randint(1, 3))))
+        trips_per_day = rng.randint(1, 3)
+
+    per_quarter = len(days) // len(quarters)
+    people = []
+    for i in range(rng.randint(2, 9)):
+        count = rng.randint(0, max(1, per_quarter * len(quarters) // rng.choice([2, 3, 5, 8])))
+        blackout = _blackout(rng, days, rng.choice([0, 2, 5, 15, 40]))
+        quarter_counts = {}
+        if len(quarters) > 1 and rng.random() < 0.2:
+            share = [rng.random() for _ in quarters]
+            quarter_counts = {q: int(count * s / sum(share)) for q, s in zip(quarters, share)}
+        people.append({"name": f"P{i}", "count": count, "blackout": [d.isoformat() for d in blackout],
+                       "quarter_counts": {str(q): n for q, n in quarter_counts.items()}})
+    # 多起点每次都要起进程池，尝试次数保持很小；优化时长按迭代次数换算，0.01 秒约 200 次迭代
+    attempts = rng.choice([1, 1, 1, 1, 2, 3])
+    optimize = rng.choice([0.0, 0.0, 0.0, 0.005, 0.02])
+    case = {"team": f"fuzz-{seed}-{index}", "year": year, "quarters": quarters,
+            "strategy": rng.choice(["exact", "exact", "greedy", "heap"]), "seed": rng.randrange(1 << 30),
+            "trim_edges": trim, "group_sizes": list(group_sizes), "trips_per_day": trips_per_day,
+            "attempts": attempts, "optimize": optimize, "people": people}
+    return case, rng.random() < 0.1
+
+
+def build_request(case, time_budget=0.2):
+    people = [PersonSpec(p["name"], int(p["count"]), [datetime.date.fromisoformat(d) for d in p["blackout"]],
+                         {int(q): int(n) for q, n in p.get("quarter_counts", {}).items()})
+              for p in case["people"]]
+    quarters = case["quarters"]
+    return ScheduleRequest(people=people, year=case["year"], quarter=quarters[0],
+                           quarters=quarters if len(quarters) > 1 else [], strategy=case["strategy"],
+                           seed=case["seed"], trim_edges=case.get("trim_edges", True),
+                           group_sizes=tuple(case.get("group_sizes") or (2,)),
+                           trips_per_day=case.get("trips_per_day") or 0, attempts=case.get("attempts", 1),
+                           optimize=case.get("optimize", 0.0), time_budget=time_budget)
+
+
+def _leave(request, result, rng):
+    """随机挑一个有行程的人，请假其中一天后重排，返回 (新请求, 新结果)"""
+    person_days = result.store.person_days()
+    busy = [name for name, ordinals in person_days.items() if ordinals]
+    if not busy:
+        return None
+    name = rng.choice(busy)
+    day = datetime.date.fromordinal(rng.choice(sorted(person_days[name])))
+    return repair(request, result, ScheduleDelta(add_blackout={name: [day]}))
+
+
+def run_case(case, do_repair=False, time_budget=0.2):
+    """运行并校验一个用例，返回 (结果类别, 问题列表)"""
+    request = build_request(case, time_budget)
+    try:
+        result = schedule(request)
+        if result.problems:
+            # 预检只应拒绝确实排不满的用例：关掉预检再排一次，排满了就是误判
+            request = dataclasses.replace(request, precheck=False)
+            unchecked = schedule(request)
+            problems = verify(request, unchecked)
+            if problems:
+                return "invalid", problems
+            if unchecked.unmet == 0:
+                return "precheck_false", [f"预检判定排不满，但求解器排满了：{result.problems[0]}"]
+            return "precheck", []
+        problems = verify(request, result)
+        if problems:
+            return "invalid", problems
+        if do_repair:
+            repaired = _leave(request, result, random.Random(case["seed"]))
+            if repaired is not None:
+                new_request, new_result = repaired
+                problems = verify(new_request, new_result)
+                if problems:
+                    return "repair_invalid", problems
+        return ("ok" if result.unmet == 0 else "unmet"), []
+    except Exception as exc:   # 求解器崩溃也算失败，保留用例
+        return "error", [f"{type(exc).__name__}: {exc}"]
+
+
+def run_chunk(seed, first, count, time_budget):
+    """子进程：连续跑 count 个用例，返回 (类别计数, 失败用例列表)"""
+    outcomes, failures = Counter(), []
+    for index in range(first, first + count):
+        case, do_repair = make_case(seed, index)
+        kind, problems = run_case(case, do_repair, time_budget)
+        outcomes[kind] += 1
+        if problems:
+            failures.append((index, kind, case, do_repair, problems))
+    return outcomes, failures
+
+
+def save_failure(out_dir, seed, index, kind, case, do_repair, problems):
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"case-{seed}-{index}.json")
+    data = dict(case, fuzz={"seed": seed, "index": index, "kind": kind, "repair": do_repair, "problems": problems})
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+    return path
+
+
+def fuzz(seed, cases=None, minutes=None, workers=None, out_dir="fuzz-failures", time_budget=0.2, log=print):
+    """跑到 cases 个用例或 minutes 分钟为止，返回类别计数"""
+    deadline = time.perf_counter() + minutes * 60 if minutes else None
+    started = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    totals, next_index, pending = Counter(), 0, set()
+
+    def more():
+        if cases is not None and next_index >= cases:
+            return False
+        return deadline is None or time.perf_counter() < deadline
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            while len(pending) < workers * 2 and more():
+                count = CHUNK if cases is None else min(CHUNK, cases - next_index)
+                pending.add(pool.submit(run_chunk, seed, next_index, count, time_budget))
+                next_index += count
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                outcomes, failures = future.result()
+                totals.update(outcomes)
+                for index, kind, case, do_repair, problems in failures:
+                    path = save_failure(out_dir, seed, index, kind, case, do_repair, problems)
+                    log(f"❌ 用例 {index} ({kind}): {problems[0]}  -> {path}")
+
+    elapsed = time.perf_counter() - started
+    n = sum(totals.values())
+    log(f"🎲 总种子 {seed}: {n} 个用例, {elapsed:.1f} 秒, {n / max(elapsed, 1e-9) * 60:,.0f} 个/分钟")
+    log("   " + ", ".join(f"{k}: {v}" for k, v in sorted(totals.items())))
+    return totals
+
+
+def replay(path, time_budget=0.2):
+    """重新运行保存的失败用例并输出问题"""
+    with open(path, encoding="utf-8") as f:
+        case = json.load(f)
+    info = case.get("fuzz", {})
+    kind, problems = run_case(case, info.get("repair", False), time_budget)
+    print(f"{path}: {kind}")
+    for msg in problems:
+        print(f"   - {msg}")
+    return 1 if problems else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TripSync 随机排期测试：随机生成团队配置，排期后逐条校验规则")
+    parser.add_argument("--minutes", type=float, default=None, help="运行时长（分钟），默认 1 分钟")
+    parser.add_argument("--cases", type=int, default=None, help="用例个数（与 --minutes 同时给出时先到为止）")
+    parser.add_argument("--workers", type=int, default=None, help="并行进程数，默认等于 CPU 核数")
+    parser.add_argument("--seed", type=int, default=None, help="总种子，默认随机")
+    parser.add_argument("--time-budget", type=float, default=0.2, help="每个用例精确求解的时间预算（秒）")
+    parser.add_argument("--out", default="fuzz-failures", help="失败用例的保存目录")
+    parser.add_argument("--replay", nargs="+", default=None, metavar="FILE", help="重新运行保存的失败用例")
+    args = parser.parse_args(argv)
+    if args.replay:
+        return max(replay(path, args.time_budget) for path in args.replay)
+    seed = args.seed if args.seed is not None else random.randrange(1 << 30)
+    minutes = args.minutes if args.minutes is not None or args.cases is not None else 1.0
+    totals = fuzz(seed, args.cases, minutes, args.workers, args.out, args.time_budget)
+    return 1 if totals["invalid"] + totals["repair_invalid"] + totals["precheck_false"] + totals["error"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+import csv
+import datetime
+import json
+import os
+import struct
+import sys
+import tempfile
+from functools import lru_cache
+
+# ==========================================
+# 节假日数据：编译好的磁盘缓存 + 本地补充数据
+# ==========================================
+# chinese_calendar 的 is_workday 每次调用都要校验年份范围，逐天建索引很慢；
+# 而且它只包含打包时已发布的年份，每年 12 月新一年的放假安排发布后，
+# 必须重新打包程序才能使用。这里改为：
+#   1. 把 chinese_calendar 的全部年份加上本地补充数据，编译成一张"每天一个字节"的
+#      工作日表，写入数据目录的 calendar.bin（一万天左右，约 10 KB）；
+#   2. 启动时整块读入这个文件，校验来源（库版本、补充文件的大小和修改时间）一致就直接使用，
+#      不一致才重新编译；数据目录不可写时只在内存中使用；
+#   3. 管理员可以在数据目录放 holidays.json / holidays.csv 补充或修正放假安排，
+#      某年只要有至少一个补充的节假日就视为该年数据已就绪，重启程序即生效。
+#      无法解析的补充文件整个跳过（不影响程序启动），错误记录在 table.errors 里，
+#      在年份锁定页面和 python -m tripsync.holidays 中显示。
+#
+# 数据目录：环境变量 TRIPSYNC_DATA_DIR，默认 ~/.tripsync；打包成 exe 时 exe 所在目录也会查找补充文件。
+# 补充文件格式：
+#   holidays.json : {"holidays": ["2027-01-01", ...], "workdays": ["2027-02-07", ...]}
+#                   （列表也可以写成 {"2027-01-01": "元旦"} 这样带名称的字典）
+#   holidays.csv  : 表头 date,type[,name]，type 为 holiday / workday（也可写 休 / 班）
+#
+#   python -m tripsync.holidays            # 查看覆盖的年份与数据来源
+#   python -m tripsync.holidays --rebuild  # 强制重新编译
+
+_MAGIC = b"TSCAL1"
+_HEADER = struct.Struct("<6sI")          # 魔数 + 头部 JSON 的长度
+OVERRIDE_NAMES = ("holidays.json", "holidays.csv")
+_TYPES = {"holiday": False, "休": False, "workday": True, "班": True}
+
+
+def data_dir():
+    return os.environ.get("TRIPSYNC_DATA_DIR") or os.path.join(os.path.expanduser("~"), ".tripsync")
+
+
+def cache_path():
+    return os.path.join(data_dir(), "calendar.bin")
+
+
+def override_paths():
+    """存在的补充数据文件（数据目录优先，其次是 exe 所在目录）"""
+    dirs = [data_dir()]
+    if getattr(sys, "frozen", False):
+        dirs.append(os.path.dirname(sys.executable))
+    paths = []
+    for d in dirs:
+        for name in OVERRIDE_NAMES:
+            path = os.path.join(d, name)
+            if os.path.isfile(path):
+                paths.append(path)
+    return paths
+
+
+def _parse_date(text):
+    return datetime.date.fromisoformat(text.strip().replace("/", "-"))
+
+
+def load_overrides(path):
+    """读取一个补充文件，返回 {日期: 是否工作日}"""
+    result = {}
+    if path.lower().endswith(".json"):
+        with open(path, encoding="utf-8-sig") as f:
+            data = json.load(f)
+        for key, flag in (("holidays", False), ("workdays", True)):
+            for day in data.get(key, []):
+                result[_parse_date(day)] = flag
+    else:
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            for row in csv.DictReader(f):
+                kind = (row.get("type") or "").strip().lower()
+                if kind not in _TYPES:
+                    raise ValueError(f"{path}: 无法识别的类型 {row.get('type')!r}（应为 holiday / workday）")
+                result[_parse_date(row["date"])] = _TYPES[kind]
+    return result
+
+
+class HolidayTable:
+    """[first_year, last_year] 内每天是否为工作日，flags 每天一个字节"""
+
+    def __init__(self, first_year, last_year, flags, supported, source, errors=()):
+        self.first_year = first_year
+        self.last_year = last_year
+        self.origin = datetime.date(first_year, 1, 1).toordinal()
+        self.flags = flags
+        self.supported = frozenset(supported)    # 有节假日数据的年份
+        self.source = source
+        self.errors = list(errors)               # 被跳过的补充文件及原因
+
+    def supports(self, year):
+        return year in self.supported
+
+    def is_workday(self, date):
+        if not self.supports(date.year):
+            raise NotImplementedError(f"no available data for year {date.year}")
+        return self.flags[date.toordinal() - self.origin] == 1
+
+    def slice(self, start, end):
+        """[start, end] 的工作日标记（bytearray），超出表的范围时返回 None"""
+        lo, hi = start.toordinal() - self.origin, end.toordinal() - self.origin
+        if lo < 0 or hi >= len(self.flags):
+            return None
+        return bytearray(self.flags[lo:hi + 1])
+
+    # --- 磁盘格式：魔数、头部 JSON、逐天标记 ---
+
+    def dump(self, f):
+        header = json.dumps({"first_year": self.first_year, "last_year": self.last_year,
+                             "supported": sorted(self.supported), "source": self.source,
+                             "errors": self.errors}).encode("utf-8")
+        f.write(_HEADER.pack(_MAGIC, len(header)))
+        f.write(header)
+        f.write(self.flags)
+
+    @classmethod
+    def load(cls, data):
+        magic, size = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError("not a TripSync calendar file")
+        header = json.loads(data[_HEADER.size:_HEADER.size + size])
+        flags = data[_HEADER.size + size:]
+        table = cls(header["first_year"], header["last_year"], flags, header["supported"], header["source"],
+                    header.get("errors", ()))
+        if len(flags) != datetime.date(table.last_year, 12, 31).toordinal() - table.origin + 1:
+            raise ValueError("truncated calendar file")
+        return table
+
+
+def _source(paths):
+    """数据来源的指纹：库版本 + 补充文件的路径、大小、修改时间"""
+    import chinese_calendar
+    files = []
+    for path in paths:
+        st = os.stat(path)
+        files.append([path, st.st_size, st.st_mtime_ns])
+    return {"chinese_calendar": chinese_calendar.__version__, "overrides": files}
+
+
+def _fresh(table, paths):
+    return table.source == _source(paths)
+
+
+def build_table(paths):
+    """由 chinese_calendar 和补充文件编译工作日表"""
+    import chinese_calendar
+    holidays, workdays = chinese_calendar.holidays, chinese_calendar.workdays
+    overrides, errors = {}, []
+    for path in paths:
+        try:
+            overrides.update(load_overrides(path))
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            # 一个文件写错（如 2027-13-01）只跳过这个文件，不能让整个程序无法启动
+            errors.append(f"{path}: {e}")
+
+    supported = set(range(min(holidays).year, max(holidays).year + 1))
+    supported |= {d.year for d, flag in overrides.items() if not flag}
+    first, last = min(supported), max(supported)
+    start = datetime.date(first, 1, 1)
+    n = datetime.date(last, 12, 31).toordinal() - start.toordinal() + 1
+
+    # 与 chinese_calendar.is_workday 的判断一致：调休上班日 > 节假日 > 周一至周五
+    flags = bytearray(n)
+    for i in range(n):
+        day = start + datetime.timedelta(days=i)
+        flag = overrides.get(day)
+        if flag is None:
+            flag = day in workdays or (day.weekday() <= 4 and day not in holidays)
+        flags[i] = 1 if flag else 0
+    return HolidayTable(first, last, bytes(flags), supported, _source(paths), errors)
+
+
+def _write(table, path):
+    """先写临时文件再替换，多个进程同时编译也不会读到半个文件"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".calendar-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            table.dump(f)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def compile_table(rebuild=False):
+    """读取磁盘缓存，过期、损坏或 rebuild 时重新编译并写回"""
+    path = cache_path()
+    paths = override_paths()
+    if not rebuild:
+        try:
+            with open(path, "rb") as f:
+                table = HolidayTable.load(f.read())
+            if _fresh(table, paths):
+                return table
+        except (OSError, ValueError, KeyError, struct.error):
+            pass
+    table = build_table(paths)
+    try:
+        _write(table, path)
+    except OSError:
+        pass   # 数据目录不可写（如只读部署）时只在内存中使用
+    return table
+
+
+@lru_cache(maxsize=None)
+def holiday_table():
+    """进程内共享的工作日表"""
+    return compile_table()
+
+
+def reload():
+    """补充文件修改后重新加载（同时清空依赖它的工作日索引缓存和按旧日历排出的结果缓存）"""
+    from tripsync import workdays
+    from tripsync.cache import get_default_cache
+    holiday_table.cache_clear()
+    workdays.get_calendar.cache_clear()
+    workdays.check_year_support.cache_clear()
+    get_default_cache().clear()
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="TripSync 节假日数据（编译缓存与本地补充）")
+    parser.add_argument("--rebuild", action="store_true", help="忽略缓存重新编译")
+    args = parser.parse_args(argv)
+    table = compile_table(rebuild=args.rebuild)
+    years = sorted(table.supported)
+    print(f"缓存文件: {cache_path()}")
+    print(f"chinese_calendar: {table.source.get('chinese_calendar')}")
+    print(f"补充文件: {', '.join(p for p, _, _ in table.source.get('overrides', [])) or '无'}")
+    print(f"覆盖年份: {years[0]}-{years[-1]}" + (f"（缺 {sorted(set(range(years[0], years[-1] + 1)) - table.supported)}）"
+                                                if len(years) != years[-1] - years[0] + 1 else ""))
+    for msg in table.errors:
+        print(f"⚠️ 已跳过无法解析的补充文件 {msg}")
+    return 1 if table.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from tripsync.cache import cached_schedule
+from tripsync.control import SolveCancelled, SolveControl
+
+# ==========================================
+# 后台排期任务
+# ==========================================
+# 界面把排期请求提交成任务后立即返回，之后每次重跑按任务编号查询进度和结果。
+# 任务在有限大小的线程池里执行，排队数量也有上限，避免局域网里多人同时
+# 点击时把服务器拖垮。任务支持取消和总时间预算（超时返回已排好的部分）。
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+CANCELLED = "cancelled"
+FAILED = "failed"
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class Job:
+
+    def __init__(self, request, time_budget=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.request = request
+        self.control = SolveControl(time_budget)
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.finished_at = None
+        self._finished = threading.Event()
+
+    @property
+    def finished(self):
+        return self.status in (DONE, CANCELLED, FAILED)
+
+    @property
+    def progress(self):
+        """(已安排次数, 总次数)"""
+        return self.control.done, self.control.total
+
+    def wait(self, timeout=None):
+        """等待任务结束，返回是否已结束"""
+        return self._finished.wait(timeout)
+
+    def _finish(self, status):
+        self.status = status
+        self.finished_at = time.time()
+        self._finished.set()
+
+
+class JobManager:
+
+    def __init__(self, max_workers=2, max_queued=8, keep_finished=64):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.keep_finished = keep_finished
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tripsync-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, request, time_budget=None):
+        """提交排期请求，返回任务编号；排队已满时抛出 JobQueueFull"""
+        return self.submit_many([request], time_budget)[0]
+
+    def submit_many(self, requests, time_budget=None):
+        """一次提交多个请求，全部接受或全部拒绝（排不下时抛出 JobQueueFull），返回任务编号列表"""
+        with self._lock:
+            active = self.active()
+            if active + len(requests) > self.max_workers + self.max_queued:
+                raise JobQueueFull(f"当前有 {active} 个排期任务在执行或排队")
+            self._prune()
+            jobs = [Job(request, time_budget) for request in requests]
+            for job in jobs:
+                self._jobs[job.id] = job
+        for job in jobs:
+            self._pool.submit(self._run, job)
+        return [job.id for job in jobs]
+
+    def active(self):
+        """正在执行或排队的任务数"""
+        return sum(1 for j in self._jobs.values() if not j.finished)
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        # 与 _run 的状态检查在同一把锁下进行：排队中的任务要么在这里直接取消，
+        # 要么已经开始执行、由求解器通过 control 响应取消，不会取消了又被标成完成
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.finished:
+                return
+            job.control.cancel()
+            if job.status == QUEUED:
+                job._finish(CANCELLED)
+
+    def _run(self, job):
+        with self._lock:
+            if job.status != QUEUED:
+                return
+            job.status = RUNNING
+        try:
+            job.result = cached_schedule(job.request, control=job.control)
+            status = DONE
+        except SolveCancelled:
+            status = CANCELLED
+        except Exception as e:
+            job.error = str(e)
+            status = FAILED
+        job._finish(status)
+
+    def _prune(self):
+        """只保留最近完成的 keep_finished 个任务"""
+        finished = sorted((j for j in self._jobs.values() if j.finished), key=lambda j: j.finished_at)
+        for job in finished[:max(len(finished) - self.keep_finished, 0)]:
+            del self._jobs[job.id]
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    """进程内共享的任务管理器（Streamlit 所有会话共用一个线程池）"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager()
+        return _manager
@@ -0,0 +1,131 @@
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from tripsync.control import SolveCancelled, SolveControl
+from tripsync.solvers import solve
+from tripsync.stats import SolverStats
+
+# ==========================================
+# 多起点并行搜索
+# ==========================================
+# 随机算法每次结果不同。这里用 N 个不同的随机种子各求解一次（可放到进程池并行），
+# 保留最好的那一份，并返回它的种子：solve(..., seed=该种子) 可以原样复现。
+#
+# "最好"依次比较：
+#   1. 未完成的次数（越少越好）
+#   2. 连续两天行程占全部出差天数的比例（越高越好）
+#   3. 每个人出差日期的分布均匀度（相邻两次出差间隔的平方和，越小越好）
+#
+# 子进程拿不到调用方的 SolveControl，时间预算按墙钟截止时刻（time.time()）传过去，
+# 每个尝试在子进程里自建 SolveControl，到点即返回已排好的部分结果。
+
+POLL_INTERVAL = 0.1   # 等待子进程结果时检查取消的间隔（秒）
+
+
+class _Person:
+    """子进程里使用的轻量人员对象（界面/命令行的人员类不一定能被 pickle）"""
+
+    def __init__(self, name, target_count, current_count, blackout_dates):
+        self.name = name
+        self.target_count = target_count
+        self.current_count = current_count
+        self.blackout_dates = blackout_dates
+
+
+def schedule_score(people, workdays, placements):
+    """返回可直接比较大小的评分元组，越小越好"""
+    unmet = sum(max(p.target_count - p.current_count, 0) for p in people)
+    total_days = 0
+    consecutive_days = 0
+    index = {d: k for k, d in enumerate(workdays)}
+    person_days = {}
+    for start, end, partners in placements:
+        length = (end - start).days + 1
+        total_days += length * len(partners)
+        if length > 1:
+            consecutive_days += length * len(partners)
+        for name in partners:
+            person_days.setdefault(name, []).append(index.get(start, 0))
+    ratio = consecutive_days / total_days if total_days else 0.0
+
+    spread = 0
+    for ks in person_days.values():
+        ks.sort()
+        spread += sum((b - a) ** 2 for a, b in zip(ks, ks[1:]))
+    return unmet, -round(ratio, 6), spread
+
+
+def _attempt(spec, workdays, strategy, seed, options, deadline=None):
+    people = [_Person(*row) for row in spec]
+    stats = SolverStats()
+    control = None
+    if deadline is not None:
+        # 已经过了截止时刻也给一个极小的预算，求解器会立即返回部分结果
+        control = SolveControl(max(deadline - time.time(), 1e-6))
+    # 贪心算法会打乱传入列表的顺序，这里传副本，按原顺序回填次数
+    placements = solve(list(people), workdays, strategy=strategy, seed=seed, stats=stats, control=control,
+                       **options)
+    counts = [p.current_count for p in people]
+    return seed, placements, counts, schedule_score(people, workdays, placements), stats
+
+
+def solve_multistart(people, workdays, attempts=8, seed=None, strategy="greedy", workers=None, stats=None,
+                     control=None, **options):
+    """
+    用 attempts 个种子（seed, seed+1, ...）分别求解，返回 (placements, 最佳种子, 评分)。
+    不给 seed 时随机选一个起始种子；workers=1 时在当前进程内顺序执行。
+    最佳结果的 current_count 会写回 people，所有尝试的计数器与耗时累加到 stats。
+    control 的进度按已完成的尝试次数汇报；control 的时间预算同样约束每个尝试，
+    超时后不再开始新的尝试。取消时丢弃排队中的尝试，也不等待仍在运行的子进程。
+    """
+    stats = stats if stats is not None else SolverStats()
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    seeds = [seed + i for i in range(attempts)]
+    spec = [(p.name, p.target_count, p.current_count, list(p.blackout_dates)) for p in people]
+    workdays = list(workdays)
+
+    deadline = None
+    if control is not None and control.deadline is not None:
+        deadline = time.time() + (control.deadline - time.perf_counter())
+
+    results = []
+    with stats.phase("multistart"):
+        if workers == 1 or attempts == 1:
+            for s in seeds:
+                if control is not None:
+                    control.report(len(results), attempts)
+                    if results and control.expired():
+                        stats.count("attempts_skipped", attempts - len(results))
+                        break
+                results.append(_attempt(spec, workdays, strategy, s, options, deadline))
+        else:
+            pool = ProcessPoolExecutor(max_workers=workers)
+            try:
+                pending = {pool.submit(_attempt, spec, workdays, strategy, s, options, deadline) for s in seeds}
+                while pending:
+                    done, pending = wait(pending, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                    results.extend(f.result() for f in done)
+                    if control is not None:
+                        control.report(len(results), attempts)
+            except SolveCancelled:
+                # 取消时丢弃排队中的尝试，不等待仍在运行的子进程（它们到截止时刻会自行结束）
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+            except BaseException:
+                # 其他错误（如解释器正在退出）仍要回收子进程，否则退出时会卡住
+                pool.shutdown(cancel_futures=True)
+                raise
+            pool.shutdown()
+        # 按种子顺序排列，保证平局时的选择与执行顺序无关
+        results.sort(key=lambda r: seeds.index(r[0]))
+    stats.count("attempts", len(results))
+    for r in results:
+        stats.merge(r[4])
+
+    # 评分相同时取种子靠前的那个，保证给定 seed 时结果确定
+    best_seed, placements, counts, score, _ = min(results, key=lambda r: (r[3], seeds.index(r[0])))
+    for p, count in zip(people, counts):
+        p.current_count = count
+    return placements, best_seed, score
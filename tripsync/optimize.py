@@ -0,0 +1,326 @@
+import math
+import random
+import time
+from dataclasses import dataclass
+
+from tripsync.availability import DAY_CAPACITY, Availability, iter_bits
+from tripsync.stats import SolverStats
+
+# ==========================================
+# 排期质量优化（局部搜索 / 模拟退火）
+# ==========================================
+# 求解器只保证次数排满，贪心算法总是让剩余最多的两人搭档，日期容易扎堆、
+# 搭档固定。这里在已有排期上做模拟退火，每次尝试一个小改动：
+#   shift : 整条行程换到别的日期
+#   swap  : 两条天数相同的双人行程各换出一个人
+#   split : 连续两天的行程拆成两次单日行程
+#   merge : 同一组人的两次单日行程合并成连续两天
+# 改动只在满足全部排期规则时才会发生，每个人的出差次数保持不变。
+# 代价增量只按受影响的人和日期计算（间隔用二分查找定位），不重算整张表。
+# 迭代次数由优化秒数按固定速率换算（ITERATIONS_PER_SECOND），不按墙钟计时，
+# 同一个种子在任何机器上都得到同一份结果；随时停止（取消、总时间预算用完）都返回目前最好的一份。
+
+
+@dataclass
+class Objective:
+    """优化目标的权重，总代价为各项加权和，越小越好"""
+    spread: float = 1.0        # 每人出差日期分布均匀：相邻两次间隔（按理想间隔归一化）的平方和
+    diversity: float = 1.0     # 搭档轮换：每对搭档同行次数的平方和
+    consecutive: float = 5.0   # 连续两天行程：每条减 1（原规则要求尽量连续，默认权重较高）
+
+
+class _LocalSearch:
+
+    def __init__(self, people, workdays, placements, day_capacity, objective):
+        grid = Availability(people, workdays, day_capacity)
+        self.avail = grid.avail
+        self.next_day_mask = grid.next_day_mask
+        self.capacity = day_capacity
+        self.names = grid.names
+        self.days = grid.days
+        self.n = n = len(grid.days)
+        self.obj = objective
+
+        size = len(people)
+        self.busy = [0] * size
+        self.trips = [[] for _ in range(size)]          # 每人已排的日期编号（有序）
+        self.load = [0] * n
+        self.open_mask = grid.full
+        self.empty_mask = grid.full
+        self.pairs = {}
+        # 理想间隔 = (n + 1) / (次数 + 1)，间隔按它归一化后不同次数的人可以直接相加
+        self.spread_weight = [
+            objective.spread * ((p.current_count + 1) / (n + 1)) ** 2 for p in people]
+
+        slot = {}
+        for i, name in enumerate(self.names):
+            slot.setdefault(name, i)
+        self.events = {}
+        self.next_id = 0
+        # 空表时每人只有一个从 -1 到 n 的间隔
+        self.cost = sum(w * (n + 1) ** 2 for w in self.spread_weight)
+        for start, end, partners in placements:
+            k = grid.index[start]
+            length = grid.index[end] - k + 1
+            self.cost += self._add(self._new_id(), k, length, tuple(slot[n] for n in partners))
+
+    def _new_id(self):
+        self.next_id += 1
+        return self.next_id
+
+    # --- 状态修改，返回代价增量 ---
+
+    def _update_masks(self, k):
+        bit = 1 << k
+        load = self.load[k]
+        if load == 0:
+            self.empty_mask |= bit
+        else:
+            self.empty_mask &= ~bit
+        if load % 2 == 0 and load + 2 <= self.capacity:
+            self.open_mask |= bit
+        else:
+            self.open_mask &= ~bit
+
+    def _gap_delta(self, i, x, insert):
+        """x 插入（或移出）第 i 人日期表时间隔平方和的变化；调用时日期表中不含 x"""
+        trips = self.trips[i]
+        pos = _bisect(trips, x)
+        a = trips[pos - 1] if pos > 0 else -1
+        b = trips[pos] if pos < len(trips) else self.n
+        delta = (x - a) ** 2 + (b - x) ** 2 - (b - a) ** 2
+        return self.spread_weight[i] * (delta if insert else -delta)
+
+    def _add(self, eid, k, length, members):
+        delta = 0.0
+        for kk in range(k, k + length):
+            bit = 1 << kk
+            for i in members:
+                delta += self._gap_delta(i, kk, True)
+                self.trips[i].insert(_bisect(self.trips[i], kk), kk)
+                self.busy[i] |= bit
+            self.load[kk] += len(members)
+            self._update_masks(kk)
+        for pair in _pairs(members):
+            c = self.pairs.get(pair, 0)
+            self.pairs[pair] = c + 1
+            delta += self.obj.diversity * (2 * c + 1)
+        if length > 1:
+            delta -= self.obj.consecutive
+        self.events[eid] = (k, length, members)
+        return delta
+
+    def _remove(self, eid):
+        k, length, members = self.events.pop(eid)
+        delta = 0.0
+        for kk in range(k, k + length):
+            bit = 1 << kk
+            for i in members:
+                self.trips[i].remove(kk)
+                self.busy[i] &= ~bit
+                delta += self._gap_delta(i, kk, False)
+            self.load[kk] -= len(members)
+            self._update_masks(kk)
+        for pair in _pairs(members):
+            c = self.pairs[pair]
+            self.pairs[pair] = c - 1
+            delta -= self.obj.diversity * (2 * c - 1)
+        if length > 1:
+            delta += self.obj.consecutive
+        return delta
+
+    # --- 可行位置 ---
+
+    def _candidates(self, length, members):
+        """当前状态下 members 能整组出发的起始日期位图"""
+        m = self.open_mask if len(members) > 1 else self.empty_mask
+        for i in members:
+            m &= self.avail[i] & ~self.busy[i]
+        if len(members) > 2:
+            m = sum(1 << k for k in iter_bits(m) if self.load[k] + len(members) <= self.capacity)
+        if length == 2:
+            m &= (m >> 1) & self.next_day_mask
+        return m
+
+    def _fits(self, k, length, members):
+        return (self._candidates(length, members) >> k) & 1 == 1
+
+    # --- 邻域操作：成功时返回 (代价增量, 撤销函数)，无可行改动时返回 None ---
+
+    def shift(self, rng):
+        eid = rng.choice(list(self.events))
+        old = self.events[eid]
+        delta = self._remove(eid)
+        m = self._candidates(old[1], old[2]) & ~(1 << old[0])
+        if not m:
+            self._add(eid, *old)
+            return None
+        delta += self._add(eid, rng.choice(list(iter_bits(m))), old[1], old[2])
+        return delta, lambda: (self._remove(eid), self._add(eid, *old))
+
+    def swap(self, rng):
+        if len(self.events) < 2:   # merge 之后可能只剩一条行程
+            return None
+        e1, e2 = rng.sample(list(self.events), 2)
+        (k1, l1, m1), (k2, l2, m2) = self.events[e1], self.events[e2]
+        if len(m1) < 2 or len(m2) < 2 or l1 != l2:   # 天数不同会改变两人的次数
+            return None
+        b, d = rng.choice(m1), rng.choice(m2)
+        if b in m2 or d in m1:
+            return None
+        n1 = tuple(d if i == b else i for i in m1)
+        n2 = tuple(b if i == d else i for i in m2)
+        delta = self._remove(e1) + self._remove(e2)
+        if self._fits(k1, l1, n1):
+            delta += self._add(e1, k1, l1, n1)
+            if self._fits(k2, l2, n2):
+                delta += self._add(e2, k2, l2, n2)
+
+                def undo():
+                    self._remove(e1); self._remove(e2)
+                    self._add(e1, k1, l1, m1); self._add(e2, k2, l2, m2)
+                return delta, undo
+            self._remove(e1)
+        self._add(e1, k1, l1, m1)
+        self._add(e2, k2, l2, m2)
+        return None
+
+    def split(self, rng):
+        eid = rng.choice(list(self.events))
+        k, length, members = old = self.events[eid]
+        if length != 2:
+            return None
+        delta = self._remove(eid)
+        delta += self._add(eid, k, 1, members)
+        m = self._candidates(1, members) & ~(1 << (k + 1))
+        if not m:
+            self._remove(eid)
+            self._add(eid, *old)
+            return None
+        new = self._new_id()
+        delta += self._add(new, rng.choice(list(iter_bits(m))), 1, members)
+
+        def undo():
+            self._remove(new); self._remove(eid)
+            self._add(eid, *old)
+        return delta, undo
+
+    def merge(self, rng):
+        eid = rng.choice(list(self.events))
+        k, length, members = old = self.events[eid]
+        if length != 1:
+            return None
+        group = set(members)
+        others = [e for e, (_, l, m) in self.events.items() if e != eid and l == 1 and set(m) == group]
+        if not others:
+            return None
+        other = rng.choice(others)
+        old_other = self.events[other]
+        delta = self._remove(eid) + self._remove(other)
+        m = self._candidates(2, members)
+        if not m:
+            self._add(eid, *old)
+            self._add(other, *old_other)
+            return None
+        delta += self._add(eid, rng.choice(list(iter_bits(m))), 2, members)
+
+        def undo():
+            self._remove(eid)
+            self._add(eid, *old); self._add(other, *old_other)
+        return delta, undo
+
+    def placements(self, events):
+        return [(self.days[k], self.days[k + length - 1], [self.names[i] for i in members])
+                for k, length, members in sorted(events.values())]
+
+
+def _bisect(values, x):
+    lo, hi = 0, len(values)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if values[mid] < x:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def _pairs(members):
+    ordered = sorted(members)
+    return [(a, b) for idx, a in enumerate(ordered) for b in ordered[idx + 1:]]
+
+
+def schedule_cost(people, workdays, placements, objective=None, day_capacity=DAY_CAPACITY):
+    """按 objective 计算一份排期的总代价（越小越好）"""
+    return _LocalSearch(people, workdays, placements, day_capacity, objective or Objective()).cost
+
+
+# 各邻域操作被选中的相对频率
+MOVES = (("shift", 4), ("swap", 3), ("split", 1), ("merge", 1))
+ITERATIONS_PER_SECOND = 20000   # 优化秒数换算成迭代次数的名义速率（小团队实测每秒约 1.5 万到 3 万次）
+
+
+def optimize(people, workdays, placements, time_budget=1.0, objective=None, day_capacity=DAY_CAPACITY, rng=None,
+             stats=None, control=None, max_iterations=None):
+    """
+    对 placements 做模拟退火，返回代价最低的 placements。
+    max_iterations 不为空时按迭代次数停止并据此降温，结果只由 rng 决定（可复现）；
+    否则按 time_budget 秒的墙钟时间停止。
+    people 的 current_count 须与 placements 一致（求解器返回后即满足），优化不改变任何人的次数。
+    control.expired() 时提前结束并返回目前最好的结果，取消时抛出 SolveCancelled。
+    """
+    rng = rng or random
+    stats = stats if stats is not None else SolverStats()
+    objective = objective or Objective()
+    if len(placements) < 2:
+        return placements
+
+    with stats.phase("optimize"):
+        search = _LocalSearch(people, workdays, placements, day_capacity, objective)
+        moves = [getattr(search, name) for name, _ in MOVES]
+        weights = [w for _, w in MOVES]
+        best_cost, best = search.cost, dict(search.events)
+
+        # 初始温度：随机试探一批改动，取变差幅度的平均值
+        worse = []
+        for _ in range(50):
+            tried = rng.choices(moves, weights)[0](rng)
+            if tried is not None:
+                if tried[0] > 0:
+                    worse.append(tried[0])
+                tried[1]()
+        t0 = sum(worse) / len(worse) if worse else 1.0
+
+        started = time.perf_counter()
+        iterations = 0
+        while True:
+            if max_iterations is not None:
+                if iterations >= max_iterations:
+                    break
+                progress = iterations / max_iterations
+            else:
+                elapsed = time.perf_counter() - started
+                if elapsed >= time_budget:
+                    break
+                progress = elapsed / time_budget if time_budget else 1.0
+            if control is not None and iterations % 256 == 0:
+                control.report(control.done, control.total)   # 只用于响应取消，进度保持求解阶段的值
+                if control.expired():
+                    stats.count("deadline_hit")
+                    break
+            iterations += 1
+            temperature = t0 * 0.001 ** progress if progress < 1.0 else 0.0
+            tried = rng.choices(moves, weights)[0](rng)
+            if tried is None:
+                continue
+            delta, undo = tried
+            if delta <= 0 or (temperature > 0 and rng.random() < math.exp(-delta / temperature)):
+                search.cost += delta
+                stats.count("ls_accepted")
+                if search.cost < best_cost - 1e-9:
+                    best_cost, best = search.cost, dict(search.events)
+                    stats.count("ls_improved")
+            else:
+                undo()
+        stats.count("ls_iterations", iterations)
+    return search.placements(best)
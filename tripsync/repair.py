@@ -0,0 +1,158 @@
+import dataclasses
+import random
+import time
+from dataclasses import dataclass, field
+
+from tripsync.engine import Person, PersonSpec, ScheduleResult, request_days, schedule
+from tripsync.events import EventStore
+from tripsync.solvers import solve_greedy, solve_groups, solve_heap
+from tripsync.stats import SolverStats
+
+# ==========================================
+# 增量修复
+# ==========================================
+# 排期表发出后，某人新增了一个黑名单日期、改了次数、有人加入或离开时，
+# 不必整张表重排：只作废受影响的行程，其他行程原样保留，
+# 再在剩下的空位里把缺的次数补上。
+#
+#   request, result = repair(request, result, ScheduleDelta(add_blackout={"张三": [date]}))
+#
+# 作废规则：
+#   - 行程中有人离开，或某一天落在某人新增的黑名单上 → 整条行程作废，同行的人一起重排
+#   - 某人目标次数调低 → 从他最晚的行程开始作废，直到不超过新目标
+#   - 总次数由奇变偶时作废原来的单人行程（奇数时才允许一次单人出差）
+# 补排只在空位里用贪心完成，保留的行程不会移动；补不满时（可选）退回整表重排，
+# 取未完成次数更少的一份。季度子目标在修复时只按总次数处理。
+
+
+@dataclass
+class ScheduleDelta:
+    """对已有排期的修改，按姓名指定"""
+    add_blackout: dict[str, list] = field(default_factory=dict)
+    remove_blackout: dict[str, list] = field(default_factory=dict)
+    counts: dict[str, int] = field(default_factory=dict)        # 新的目标次数
+    add_people: list[PersonSpec] = field(default_factory=list)
+    remove_people: list[str] = field(default_factory=list)
+
+
+def apply_delta(request, delta):
+    """返回应用修改后的新请求（不修改原请求）"""
+    removed = set(delta.remove_people)
+    people = []
+    for p in request.people:
+        if p.name in removed:
+            continue
+        blackout = set(p.blackout) | set(delta.add_blackout.get(p.name, []))
+        blackout -= set(delta.remove_blackout.get(p.name, []))
+        people.append(dataclasses.replace(p, count=delta.counts.get(p.name, p.count), blackout=sorted(blackout)))
+    people += delta.add_people
+    return dataclasses.replace(request, people=people)
+
+
+def _invalidate(events, request, delta):
+    """返回 (保留的行程, 作废的行程数)"""
+    removed = set(delta.remove_people)
+    specs = {p.name: p for p in request.people}
+    blocked = {name: set(days) for name, days in delta.add_blackout.items()}
+
+    kept = []
+    for e in events:
+        if any(n in removed or n not in specs for n in e.partners):
+            continue
+        days = {e.start_date.fromordinal(o) for o in range(e.start_date.toordinal(), e.end_date.toordinal() + 1)}
+        if any(blocked.get(n, set()) & days for n in e.partners):
+            continue
+        kept.append(e)
+
+    # 目标调低：从最晚的行程开始作废
+    counts = {}
+    for e in kept:
+        for n in e.partners:
+            counts[n] = counts.get(n, 0) + e.days_count
+    for name, spec in specs.items():
+        excess = counts.get(name, 0) - spec.total
+        for e in sorted((e for e in kept if name in e.partners), key=lambda e: e.start_date, reverse=True):
+            if excess <= 0:
+                break
+            kept.remove(e)
+            excess -= e.days_count
+            for n in e.partners:
+                counts[n] -= e.days_count
+
+    # 双人规则下单人行程只在总次数为奇数时允许（分组模式按 group_sizes，不作废）
+    total = sum(p.total for p in request.people)
+    if total % 2 == 0 and not request.group_mode:
+        kept = [e for e in kept if len(e.partners) > 1]
+    return kept, len(events) - len(kept)
+
+
+def _replace(request, workdays, kept, max_tries, rng, stats, control):
+    """保留 kept，在空位里补排，返回 (未完成次数, 人员, 新增 placements)"""
+    fixed = [(e.start_date, e.end_date, e.partners) for e in kept]
+    done = {}
+    for e in kept:
+        for n in e.partners:
+            done[n] = done.get(n, 0) + e.days_count
+    if request.group_mode:
+        options = dict(group_sizes=tuple(request.group_sizes), trips_per_day=request.day_trips)
+        solver = solve_groups
+    else:
+        options = dict(day_capacity=request.day_capacity)
+        solver = solve_heap if len(request.people) > 50 else solve_greedy
+    best = None
+    for _ in range(max_tries):
+        people = [Person(p.name, p.total, p.blackout) for p in request.people]
+        for p in people:
+            p.current_count = done.get(p.name, 0)
+        placements = solver(list(people), workdays, rng=random.Random(rng.randrange(2 ** 32)), stats=stats,
+                            control=control, fixed=fixed, **options)
+        unmet = sum(max(p.remaining(), 0) for p in people)
+        if best is None or unmet < best[0]:
+            best = (unmet, people, placements)
+        if unmet == 0:
+            break
+    return best
+
+
+def repair(request, result, delta, max_tries=8, fallback=True, control=None):
+    """
+    在 result（由 request 排出）的基础上应用 delta，返回 (新请求, 新结果)。
+    max_tries：补排时尝试的随机种子数，补满即停；fallback：补不满时再整表重排一次比较。
+    """
+    started = time.perf_counter()
+    stats = SolverStats()
+    new_request = apply_delta(request, delta)
+    with stats.phase("calendar"):
+        workdays = request_days(new_request)
+
+    with stats.phase("invalidate"):
+        kept, dropped = _invalidate(result.events, new_request, delta)
+    stats.count("repair_kept", len(kept))
+    stats.count("repair_invalidated", dropped)
+
+    rng = random.Random(result.seed)
+    with stats.phase("replace"):
+        unmet, people, placements = _replace(new_request, workdays, kept, max_tries, rng, stats, control)
+        if unmet:
+            # 局部扩大：把仍然缺次数的人的其余行程也作废，和他们一起重排
+            short = {p.name for p in people if p.remaining() > 0}
+            wider = [e for e in kept if not short & set(e.partners)]
+            stats.count("repair_widened")
+            retry = _replace(new_request, workdays, wider, max_tries, rng, stats, control)
+            if retry[0] < unmet:
+                kept = wider
+                unmet, people, placements = retry
+    stats.count("repair_placed", len(placements))
+
+    with stats.phase("events"):
+        store = EventStore.from_placements([(e.start_date, e.end_date, e.partners) for e in kept] + placements)
+    repaired = ScheduleResult(store, people, result.seed, [], stats, time.perf_counter() - started)
+
+    if unmet and fallback:
+        stats.count("repair_fallback")
+        full = schedule(dataclasses.replace(new_request, seed=result.seed), control=control)
+        if full.unmet < unmet and not full.problems:
+            full.stats.merge(stats)
+            full.wall_time = time.perf_counter() - started
+            return new_request, full
+    return new_request, repaired
@@ -0,0 +1,339 @@
+import argparse
+import json
+import math
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from tripsync.availability import DAY_CAPACITY
+from tripsync.cache import get_default_cache
+from tripsync.engine import PersonSpec, ScheduleRequest, parse_blackout
+from tripsync.jobs import DONE, JobManager, JobQueueFull
+from tripsync.stats import SolverStats
+from tripsync.workdays import check_year_support
+
+# ==========================================
+# 本地排期服务（HTTP / JSON）
+# ==========================================
+# 给人事、审批等内部脚本调用的轻量接口，只用标准库，默认只监听 127.0.0.1。
+# 请求在进程内的任务池（JobManager）里执行：所有工作线程共用同一份节假日表、
+# 年历索引和结果缓存，启动时先预热，第一个请求就不用再建表。
+#
+#   POST /schedule   单个请求对象，或 {"requests": [...]} 批量提交；等全部排完后一起返回
+#   GET  /metrics    请求数、排期数、吞吐量（最近一分钟 / 启动以来）、延迟分位数、排队情况
+#   GET  /health     健康检查
+#
+# 请求对象（字段与批量排期的团队 JSON 一致，黑名单可写 'MM-DD' 或 'YYYY-MM-DD'）：
+#   {"year": 2026, "quarter": 1,                 # 或 "quarters": [1, 2, 3, 4] 多季度一次排
+#    "seed": 1, "strategy": "exact", "trim_edges": true,
+#    "group_sizes": [2, 3], "trips_per_day": 3,  # 可选：分组模式
+#    "people": [{"name": "张三", "count": 12, "blackout": ["01-05"], "quarter_counts": {"1": 5}}]}
+#
+# 背压：执行中加排队的任务数达到上限时，整批拒绝并返回 429（带 Retry-After），
+# 调用方稍后重试即可；单批超过 --max-batch 个请求返回 413。
+#
+#   python -m tripsync.service --port 8765 --workers 4
+#   curl -s localhost:8765/schedule -d '{"year": 2026, "quarter": 1, "people": [...]}'
+
+MAX_BODY = 4 * 1024 * 1024
+MAX_TIME_BUDGET = 10.0   # 单个请求精确求解的时间预算上限（秒）
+STRATEGIES = ("exact", "greedy", "heap")
+
+
+class RequestError(ValueError):
+    """请求内容不合法（返回 400）"""
+
+
+def _int(item, key, default=None):
+    value = item.get(key, default)
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise RequestError(f"{key} 应为整数：{value!r}")
+
+
+def _blackout(row):
+    value = row.get("blackout") or []
+    if isinstance(value, str):
+        value = value.replace(";", " ").split()
+    if not isinstance(value, list) or not all(isinstance(s, str) for s in value):
+        raise RequestError(f"{row['name']} 的 blackout 应为日期字符串列表")
+    return value
+
+
+def _quarter_counts(row):
+    value = row.get("quarter_counts") or {}
+    if not isinstance(value, dict):
+        raise RequestError(f"{row['name']} 的 quarter_counts 应为 {{季度: 次数}} 对象")
+    counts = {}
+    for q, n in value.items():
+        try:
+            q, n = int(q), int(n)
+        except (TypeError, ValueError):
+            raise RequestError(f"{row['name']} 的 quarter_counts 应为整数：{q!r}: {n!r}")
+        if not 1 <= q <= 4 or n < 0:
+            raise RequestError(f"{row['name']} 的 quarter_counts 季度应为 1-4、次数不能为负")
+        counts[q] = n
+    return counts
+
+
+def _time_budget(item):
+    value = item.get("time_budget", 2.0)
+    try:
+        budget = float(value)
+    except (TypeError, ValueError):
+        raise RequestError(f"time_budget 应为秒数：{value!r}")
+    if not math.isfinite(budget) or budget < 0:
+        raise RequestError(f"time_budget 应为非负有限秒数：{value!r}")
+    return min(budget, MAX_TIME_BUDGET)
+
+
+def parse_request(item):
+    """把一个 JSON 请求对象转成 ScheduleRequest，内容不合法时抛出 RequestError"""
+    if not isinstance(item, dict):
+        raise RequestError("每个请求应为 JSON 对象")
+    year = _int(item, "year")
+    if not check_year_support(year):
+        raise RequestError(f"没有 {year} 年的节假日数据")
+    quarters = sorted({int(q) for q in item.get("quarters") or []})
+    quarter = _int(item, "quarter", quarters[0] if quarters else None)
+    if not all(1 <= q <= 4 for q in quarters + [quarter]):
+        raise RequestError("季度应为 1-4")
+    strategy = item.get("strategy") or "exact"
+    if strategy not in STRATEGIES:
+        raise RequestError(f"未知的排期算法：{strategy}")
+    rows = item.get("people")
+    if not isinstance(rows, list) or not rows:
+        raise RequestError("people 应为非空列表")
+    people = []
+    for r in rows:
+        if not isinstance(r, dict) or not r.get("name"):
+            raise RequestError("每个人员应为包含 name 的 JSON 对象")
+        count = _int(r, "count")
+        if count < 0:
+            raise RequestError(f"{r['name']} 的 count 不能为负：{count}")
+        people.append(PersonSpec(str(r["name"]), count, parse_blackout(year, _blackout(r)), _quarter_counts(r)))
+    if len({p.name for p in people}) != len(people):
+        raise RequestError("人员姓名不能重复")
+    group_sizes = tuple(int(n) for n in item.get("group_sizes") or (2,))
+    if not all(1 <= n <= DAY_CAPACITY for n in group_sizes):
+        raise RequestError(f"每组人数应为 1-{DAY_CAPACITY}")
+    seed = item.get("seed")
+    return ScheduleRequest(people=people, year=year, quarter=quarter, quarters=quarters if len(quarters) > 1 else [],
+                           strategy=strategy, seed=None if seed is None else _int(item, "seed"),
+                           trim_edges=bool(item.get("trim_edges", True)),
+                           time_budget=_time_budget(item),
+                           group_sizes=group_sizes,
+                           trips_per_day=_int(item, "trips_per_day", 0))
+
+
+def result_payload(request, result):
+    """排期结果的 JSON 表示：行程、每人完成情况、预检问题与统计"""
+    return {"period": request.period_tag, "seed": result.seed, "problems": result.problems,
+            "unmet": result.unmet, "events": result.store.records(),
+            "people": [{"name": p.name, "count": p.current_count, "target": p.target_count} for p in result.people],
+            "stats": result.stats.as_dict(), "wall_time_ms": round(result.wall_time * 1000, 3)}
+
+
+class Metrics:
+    """线程安全的服务指标：计数器、最近的延迟样本和完成时间"""
+
+    def __init__(self, window=60.0, samples=2048):
+        self.window = window
+        self.started = time.time()
+        self.counters = {}
+        self._latency = deque(maxlen=samples)     # 每个排期请求从提交到完成的秒数
+        self._done = deque()                      # 最近 window 秒内完成的时间点
+        self._lock = threading.Lock()
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, seconds):
+        now = time.time()
+        with self._lock:
+            self._latency.append(seconds)
+            self._done.append(now)
+            while self._done and self._done[0] < now - self.window:
+                self._done.popleft()
+
+    def snapshot(self):
+        now = time.time()
+        with self._lock:
+            counters = dict(self.counters)
+            latency = sorted(self._latency)
+            recent = sum(1 for t in self._done if t >= now - self.window)
+        uptime = now - self.started
+        window = min(self.window, uptime) or 1e-9
+
+        def pct(q):
+            if not latency:
+                return None
+            return round(latency[min(len(latency) - 1, int(q * len(latency)))] * 1000, 3)
+
+        return {"uptime_s": round(uptime, 1), "counters": counters,
+                "throughput_per_s": {"recent": round(recent / window, 2),
+                                     "overall": round(counters.get("schedules", 0) / (uptime or 1e-9), 2)},
+                "latency_ms": {"p50": pct(0.5), "p95": pct(0.95), "p99": pct(0.99),
+                               "max": round(latency[-1] * 1000, 3) if latency else None,
+                               "samples": len(latency)}}
+
+
+class ScheduleService:
+    """解析请求、提交到任务池、等待结果；与 HTTP 无关，方便在脚本里直接调用"""
+
+    def __init__(self, workers=2, max_queued=32, max_batch=64, timeout=60.0):
+        self.jobs = JobManager(max_workers=workers, max_queued=max_queued, keep_finished=max(256, max_batch * 4))
+        self.max_batch = min(max_batch, workers + max_queued)   # 更大的批次永远排不进队列
+        self.timeout = timeout
+        self.metrics = Metrics()
+
+    def schedule(self, payload):
+        """处理一次 POST /schedule，返回 (HTTP 状态码, 响应对象)；意外错误返回 500，不会断开连接"""
+        try:
+            return self._schedule(payload)
+        except Exception as e:
+            self.metrics.count("errors")
+            return 500, {"error": f"服务内部错误：{type(e).__name__}: {e}"}
+
+    def _schedule(self, payload):
+        batched = isinstance(payload, dict) and "requests" in payload
+        items = payload["requests"] if batched else [payload]
+        if not isinstance(items, list) or not items:
+            return 400, {"error": "requests 应为非空列表"}
+        if len(items) > self.max_batch:
+            return 413, {"error": f"单批最多 {self.max_batch} 个请求"}
+        try:
+            requests = [parse_request(item) for item in items]
+        except (RequestError, ValueError, TypeError) as e:
+            self.metrics.count("bad_requests")
+            return 400, {"error": str(e)}
+        try:
+            job_ids = self.jobs.submit_many(requests, time_budget=self.timeout)
+        except JobQueueFull as e:
+            self.metrics.count("rejected", len(requests))
+            return 429, {"error": f"排期队列已满，请稍后重试（{e}）"}
+        self.metrics.count("batches" if batched else "singles")
+
+        jobs = [self.jobs.get(job_id) for job_id in job_ids]
+        deadline = time.perf_counter() + self.timeout
+        results = []
+        for request, job in zip(requests, jobs):
+            if not job.wait(max(deadline - time.perf_counter(), 0)):
+                self.jobs.cancel(job.id)
+                job.wait(1.0)
+            results.append(self._payload(request, job))
+        if batched:
+            return 200, {"results": results}   # 批量时逐个看 status
+        return (200 if results[0]["status"] == DONE else 500), results[0]
+
+    def _payload(self, request, job):
+        latency = (job.finished_at or time.time()) - job.submitted_at
+        if job.status == DONE:
+            self.metrics.count("schedules")
+            self.metrics.observe(latency)
+            body = result_payload(request, job.result)
+        else:
+            self.metrics.count(f"jobs_{job.status}")
+            body = {"error": job.error or "排期超时或已取消"}
+        return dict(body, status=job.status, job_id=job.id, latency_ms=round(latency * 1000, 3))
+
+    def metrics_payload(self):
+        data = self.metrics.snapshot()
+        data["queue"] = {"active": self.jobs.active(), "workers": self.jobs.max_workers,
+                         "capacity": self.jobs.max_workers + self.jobs.max_queued}
+        cache = get_default_cache()
+        data["cache"] = {"size": len(cache), "hits": cache.hits, "misses": cache.misses}
+        return data
+
+
+class Handler(BaseHTTPRequestHandler):
+    service = None   # 由 make_server 绑定
+    server_version = "TripSync"
+
+    def _send(self, status, body, headers=()):
+        data = json.dumps(body, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/health":
+            self._send(200, {"status": "ok"})
+        elif path == "/metrics":
+            self._send(200, self.service.metrics_payload())
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/schedule":
+            self._send(404, {"error": "not found"})
+            return
+        try:
+            size = int(self.headers["Content-Length"])
+        except (TypeError, ValueError):
+            self._send(400, {"error": "缺少或无法识别 Content-Length"})
+            return
+        if size < 0:
+            self._send(400, {"error": "Content-Length 不能为负"})
+            return
+        if size > MAX_BODY:
+            self._send(413, {"error": "请求内容过大"})
+            return
+        try:
+            payload = json.loads(self.rfile.read(size) or b"null")
+        except ValueError:
+            self._send(400, {"error": "请求内容不是合法的 JSON"})
+            return
+        self.service.metrics.count("http_requests")
+        status, body = self.service.schedule(payload)
+        self._send(status, body, [("Retry-After", "1")] if status == 429 else ())
+
+    def log_message(self, fmt, *args):
+        pass   # 不逐条打印访问日志，统计见 /metrics
+
+
+def make_server(host="127.0.0.1", port=8765, service=None, warm=True):
+    """创建（但不启动）HTTP 服务；warm 时先预热节假日表和年历索引"""
+    service = service or ScheduleService()
+    if warm:
+        from tripsync.startup import warm_up
+        warm_up(SolverStats())
+    handler = type("TripSyncHandler", (Handler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TripSync 本地排期服务（HTTP / JSON）")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址，默认只允许本机访问")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=2, help="同时执行的排期任务数")
+    parser.add_argument("--max-queued", type=int, default=32, help="排队任务数上限，超过时返回 429")
+    parser.add_argument("--max-batch", type=int, default=64, help="单批最多请求数")
+    parser.add_argument("--timeout", type=float, default=60.0, help="每批请求的总时间预算（秒）")
+    args = parser.parse_args(argv)
+    service = ScheduleService(args.workers, args.max_queued, args.max_batch, args.timeout)
+    server = make_server(args.host, args.port, service)
+    print(f"🚀 TripSync 排期服务已启动: http://{args.host}:{server.server_port} （Ctrl+C 退出）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,647 @@
+import datetime
+import heapq
+import random
+import time
+
+from tripsync.availability import DAY_CAPACITY, Availability, GroupAvailability, iter_bits
+from tripsync.feasibility import check_feasibility
+from tripsync.stats import SolverStats
+
+# ==========================================
+# 排期求解器
+# ==========================================
+# 所有求解器接收同样的输入：
+#   people   : 人员对象列表，需要有 name / target_count / current_count / blackout_dates
+#   workdays : 可排期的工作日列表（已排序）
+# 返回 placements 列表，每项为 (开始日期, 结束日期, [人员姓名])，
+# 并直接累加每个人的 current_count。调用方负责把 placements 包装成 TripEvent。
+#
+# 排期规则（与原随机算法保持一致）：
+#   - 每天最多两组双人出差（当天占用人数只能是 0 / 2 / 4，day_capacity 可调）
+#   - 总次数为奇数时，安排一次单人出差，且当天不能再有其他人
+#   - 同一个人同一天只能出现一次，黑名单日期不可排
+#   - 尽量安排连续两天的行程
+# 分组模式（group_sizes 不只是双人）的规则见 solve_groups。
+
+ONE_DAY = datetime.timedelta(days=1)
+
+
+def _remaining(p):
+    return p.target_count - p.current_count
+
+
+def _place_solo(people, grid, slot, placements, stats):
+    """总次数为奇数时，给目标次数最多的人安排一次单人出差（最早的空闲日）；不改变 people 的顺序"""
+    total_needed = sum(_remaining(p) for p in people)
+    if total_needed % 2 != 0:
+        # 增量修复时目标最多的人可能已经排满，取还缺次数的人（目标相同时取靠前的人）
+        solo_p = max((p for p in people if _remaining(p) > 0), key=lambda x: x.target_count)
+        days = grid.solo_days(slot[id(solo_p)])
+        if days:
+            k = next(iter_bits(days))
+            day = grid.days[k]
+            placements.append((day, day, [solo_p.name]))
+            solo_p.current_count += 1
+            grid.place([slot[id(solo_p)]], k)
+        else:
+            stats.count("solo_failed")
+
+
+# --- 1. 随机贪心（原算法） ---
+
+def solve_greedy(people, workdays, max_loops=5000, day_capacity=DAY_CAPACITY, rng=None, stats=None, control=None,
+                 fixed=None):
+    """
+    每轮挑剩余次数最多的两人，在两人共同空闲的日期里随机选一个，失败则重试。
+    fixed 为已经排好、需要保留的行程（其次数已计入 current_count），只在剩下的空位里排。
+    """
+    rng = rng or random
+    stats = stats if stats is not None else SolverStats()
+    grid = Availability(people, workdays, day_capacity)
+    if fixed:
+        grid.preload(fixed)
+    slot = {id(p): i for i, p in enumerate(people)}
+    placements = []
+
+    with stats.phase("solo"):
+        _place_solo(people, grid, slot, placements, stats)
+
+    with stats.phase("pairing"):
+        placements += _greedy_pairing(people, grid, slot, max_loops, rng, stats, control)
+    return placements
+
+
+def _greedy_pairing(people, grid, slot, max_loops, rng, stats, control):
+    placements = []
+    total = sum(p.target_count for p in people)
+    loop = 0
+    while loop < max_loops:
+        stats.count("iterations")
+        if control is not None:
+            control.report(sum(p.current_count for p in people), total)
+            if control.expired():
+                stats.count("deadline_hit")
+                break
+        needy = [p for p in people if _remaining(p) > 0]
+        if not needy: break
+        needy.sort(key=_remaining, reverse=True)
+        if len(needy) < 2: break
+        p1, p2 = needy[0], needy[1]
+        i, j = slot[id(p1)], slot[id(p2)]
+        success = False
+
+        # 优先连续两天
+        if _remaining(p1) >= 2 and _remaining(p2) >= 2:
+            runs = grid.pair_runs(i, j)
+            if runs:
+                k = rng.choice(list(iter_bits(runs)))
+                placements.append((grid.days[k], grid.days[k + 1], [p1.name, p2.name]))
+                p1.current_count += 2; p2.current_count += 2
+                grid.place([i, j], k, 2)
+                success = True
+            else:
+                stats.count("consecutive_failed")
+        if not success:
+            days = grid.pair_days(i, j)
+            if days:
+                k = rng.choice(list(iter_bits(days)))
+                day = grid.days[k]
+                placements.append((day, day, [p1.name, p2.name]))
+                p1.current_count += 1; p2.current_count += 1
+                grid.place([i, j], k)
+                success = True
+            else:
+                stats.count("single_failed")
+        if not success:
+            loop += 1; rng.shuffle(people)
+            stats.count("shuffles")
+
+    if loop >= max_loops:
+        stats.count("loop_exhausted")
+    return placements
+
+
+# --- 2. 精确回溯搜索 ---
+
+class _Timeout(Exception):
+    pass
+
+
+def _class_combos(classes, extra, start=0):
+    """从若干类可互换的人中一共选 extra 个，每类取前几个；靠前的类优先多取"""
+    if extra == 0:
+        yield []
+        return
+    if start == len(classes):
+        return
+    members = classes[start]
+    for take in range(min(extra, len(members)), -1, -1):
+        for rest in _class_combos(classes, extra - take, start + 1):
+            yield members[:take] + rest
+
+
+class _ExactSearch:
+    """
+    按日期顺序逐天决定"当天出差的人员集合"（0 / 2 / 4 人，或一次单人），
+    配合剪枝做深度优先搜索：
+      - 容量界：每人剩余次数不能超过其之后可出差的天数
+      - 搭档界：每人剩余次数不能超过其他人剩余次数之和（双人出差需要搭档）
+      - 强制传播：剩余次数恰好等于剩余可用天数的人，当天必须出差
+      - 对称性消除：剩余次数与今后可用日期都相同的人视为可互换，只枚举每类选几人
+      - 失败状态记忆：等价的 (日期, 剩余次数, 是否还需单人) 状态只搜索一次
+    找到解即返回；证明无解或超出时间预算则返回 None。
+    """
+
+    def __init__(self, people, workdays, time_budget, day_capacity=DAY_CAPACITY, control=None, prefer_runs=True,
+                 rng=None):
+        self.people = people
+        self.prefer_runs = prefer_runs
+        self.control = control
+        self.capacity = day_capacity
+        self.days = workdays
+        self.n = len(people)
+        # 最后一级平局按随机名次打破：不同种子搜索顺序不同，多起点尝试才能得到不同的排期
+        self.rank = list(range(self.n))
+        if rng is not None:
+            rng.shuffle(self.rank)
+        n_days = len(workdays)
+        grid = Availability(people, workdays, day_capacity)
+        self.avail = grid.avail
+        # future[i][k]: 第 i 人在第 k 天及之后可出差的天数
+        self.future = [[grid.available_from(i, k) for k in range(n_days + 1)] for i in range(self.n)]
+        self.deadline = time.perf_counter() + time_budget if time_budget else None
+        self.nodes = 0
+        self.pruned = 0
+        self.timed_out = False
+        self.failed = set()
+        self.chosen = [()] * n_days
+
+    def run(self):
+        rem = [max(_remaining(p), 0) for p in self.people]
+        self.initial = sum(rem)
+        solo = self.initial % 2 == 1
+        try:
+            if self._search(0, rem, solo):
+                return self.chosen
+        except _Timeout:
+            self.timed_out = True
+        return None
+
+    def _bounded(self, k, rem, solo):
+        total = 0
+        for i in range(self.n):
+            r = rem[i]
+            if r > self.future[i][k]:
+                return False
+            total += r
+        spare = 1 if solo else 0
+        for r in rem:
+            if r > total - r + spare:
+                return False
+        # 单人出差日当天不能再安排其他人，占掉一整天的容量
+        return total <= self.capacity * (len(self.days) - k - spare) + spare
+
+    def _search(self, k, rem, solo):
+        total = sum(rem)
+        if total == 0:
+            return True
+        if k == len(self.days):
+            return False
+        self.nodes += 1
+        if self.nodes % 256 == 0:
+            if self.deadline and time.perf_counter() > self.deadline:
+                raise _Timeout()
+            if self.control is not None:
+                self.control.report(self.initial - total, self.initial)
+                if self.control.expired():
+                    raise _Timeout()
+        # 剩余次数和今后可用日期都相同的人可以互换，状态按这个多重集合记忆
+        key = (k, solo, tuple(sorted((rem[i], self.avail[i] >> k) for i in range(self.n) if rem[i])))
+        if key in self.failed:
+            self.pruned += 1
+            return False
+        if not self._bounded(k, rem, solo):
+            self.pruned += 1
+            self.failed.add(key)
+            return False
+
+        cand = [i for i in range(self.n) if rem[i] > 0 and (self.avail[i] >> k) & 1]
+        forced = [i for i in cand if rem[i] == self.future[i][k]]
+        if len(forced) > self.capacity:
+            self.failed.add(key)
+            return False
+        forced_set = set(forced)
+        # 越紧张（可用天数余量越小、剩余次数越多）的人越优先，
+        # 同等紧张时优先前一天出差的人、明天也能出差的人，便于合并成连续两天的行程
+        prev = self.chosen[k - 1] if k else ()
+        adjacent = k + 1 < len(self.days) and self.days[k + 1] - self.days[k] == ONE_DAY
+        free = sorted((i for i in cand if i not in forced_set),
+                      key=lambda i: (self.future[i][k] - rem[i], -rem[i], i not in prev,
+                                     not (adjacent and rem[i] > 1 and (self.avail[i] >> (k + 1)) & 1),
+                                     self.rank[i]))
+        # 可互换的人归为一类，只枚举每类选几个人，避免对称的重复组合
+        classes = {}
+        for i in free:
+            classes.setdefault((rem[i], self.avail[i] >> k), []).append(i)
+        classes = list(classes.values())
+
+        # 按累计进度均匀分布：优先选让"已安排人次"最接近均匀进度的人数，行程不会都挤到季度末
+        if self.prefer_runs:
+            behind = self.initial * (k + 1) / len(self.days) - (self.initial - total)
+            if not adjacent:
+                behind -= 2   # 明天不相邻（周末、节假日前）出发只能是单日行程，能推迟就推迟
+        else:
+            behind = total / (len(self.days) - k)   # 只按剩余平均速度，最容易找到可行解
+        sizes = sorted(list(range(0, self.capacity + 1, 2)) + ([1] if solo else []),
+                       key=lambda s: (abs(s - behind), -s))
+        # 尽量连续两天：先试"前一天刚出发的人今天继续出差"，配对时就能合并成两天的行程
+        extend = self._extension(k, cand, forced) if self.prefer_runs else None
+        if extend is not None:
+            for i in extend:
+                rem[i] -= 1
+            self.chosen[k] = extend
+            if self._search(k + 1, rem, solo):
+                return True
+            for i in extend:
+                rem[i] += 1
+        for size in sizes:
+            extra = size - len(forced)
+            if extra < 0 or extra > len(free):
+                continue
+            if size == 1 and forced:
+                # 单人出差日只能是强制的那个人
+                combos = [()]
+            else:
+                combos = _class_combos(classes, extra)
+            for combo in combos:
+                group = tuple(forced) + tuple(combo)
+                if extend is not None and set(group) == set(extend):
+                    continue   # 上面已经试过
+                for i in group:
+                    rem[i] -= 1
+                self.chosen[k] = group
+                if self._search(k + 1, rem, solo and size != 1):
+                    return True
+                for i in group:
+                    rem[i] += 1
+        self.chosen[k] = ()
+        self.failed.add(key)
+        return False
+
+
+    def _extension(self, k, cand, forced):
+        """前一天（相邻日期）刚开始行程、今天还能出差的人（凑成偶数）加上强制的人，人数合规时返回该组合"""
+        if not k or self.days[k] - self.days[k - 1] != ONE_DAY:
+            return None
+        started = set(self.chosen[k - 1])
+        if len(started) < 2:
+            return None
+        if k >= 2 and self.days[k - 1] - self.days[k - 2] == ONE_DAY:
+            started -= set(self.chosen[k - 2])   # 前两天已经连续出差的人不再延长
+        cand = set(cand)
+        more = [i for i in self.chosen[k - 1] if i in started and i in cand and i not in forced]
+        if (len(forced) + len(more)) % 2 and more:
+            more.pop()   # 凑成偶数人，少延长一人
+        group = tuple(forced) + tuple(more)
+        if not more or len(group) % 2 or len(group) > self.capacity:
+            return None
+        return group
+
+
+def _build_placements(people, workdays, chosen):
+    """把每天的出差人员集合配对成行程，尽量合并成连续两天，并累加 current_count"""
+    trips = []  # [开始日期, 结束日期, (人员下标...)]
+    workdays_set = set(workdays)
+    open_pairs = {}  # 前一天开始、还可以延长到今天的单日行程: pair -> trips 下标
+    for k, day in enumerate(workdays):
+        group = chosen[k]
+        if len(group) == 1:
+            trips.append([day, day, group])
+            open_pairs = {}
+            continue
+        left = set(group)
+        # 1) 延长前一天的行程
+        if day - ONE_DAY in workdays_set:
+            for pair, idx in open_pairs.items():
+                if pair <= left:
+                    trips[idx][1] = day
+                    left -= pair
+        open_pairs = {}
+        # 2) 剩下的人配对：明天也出差的人优先互相配对，方便明天延长
+        tomorrow = ()
+        if k + 1 < len(workdays) and workdays[k + 1] == day + ONE_DAY:
+            tomorrow = chosen[k + 1]
+        ordered = sorted((i for i in group if i in left), key=lambda i: i not in tomorrow)
+        for a, b in zip(ordered[::2], ordered[1::2]):
+            open_pairs[frozenset((a, b))] = len(trips)
+            trips.append([day, day, (a, b)])
+
+    placements = []
+    for start, end, slots in trips:
+        for i in slots:
+            people[i].current_count += (end - start).days + 1
+        placements.append((start, end, [people[i].name for i in slots]))
+    return placements
+
+
+def solve_exact(people, workdays, time_budget=2.0, day_capacity=DAY_CAPACITY, stats=None, control=None, rng=None):
+    """
+    精确求解：只要存在满足所有人目标次数的排期，就一定能找到（在时间预算内）。
+    无解或超时返回 None，此时不修改任何人的 current_count。
+    给定 rng 时同等紧张的人按随机顺序尝试，不同种子可得到不同的排期。
+    """
+    stats = stats if stats is not None else SolverStats()
+    # 先按"连续两天、均匀分布"的顺序搜索，用一半预算；超时（不是证明无解）再按原来的顺序搜索剩余预算
+    started = time.perf_counter()
+    for prefer_runs in (True, False):
+        budget = time_budget / 2 if prefer_runs else time_budget - (time.perf_counter() - started)
+        if time_budget and budget <= 0:
+            break
+        search = _ExactSearch(people, workdays, budget, day_capacity, control, prefer_runs, rng)
+        with stats.phase("search"):
+            chosen = search.run()
+        stats.count("iterations", search.nodes)
+        stats.count("pruned", search.pruned)
+        if not search.timed_out or (control is not None and control.expired()):
+            break
+        if prefer_runs:
+            stats.count("exact_retry_plain")
+    if search.timed_out:
+        stats.count("exact_timeout")
+    if chosen is None:
+        if not search.timed_out:
+            stats.count("exact_infeasible")
+        return None
+    with stats.phase("pairing"):
+        return _build_placements(people, workdays, chosen)
+
+
+# --- 3. 大团队：堆驱动的贪心 ---
+
+def solve_heap(people, workdays, day_capacity=DAY_CAPACITY, max_partner_tries=32, rng=None, stats=None,
+               control=None, fixed=None):
+    """
+    面向几百人规模的排期。与随机贪心的区别：
+      - 按剩余次数维护一个最大堆，不再每轮重建并排序 needy 列表
+      - 每日空位由 Availability 的位图增量维护，两人的候选日期一次按位与得到
+      - 某人与堆里前 max_partner_tries 个人都凑不出日期时直接放弃该人，不做全局重试
+        （只试了部分搭档，放弃的人可能还有未尝试的搭档能排上，因此不保证排满；
+        需要排满时用精确求解）
+    每轮代价：堆操作 O(log P) + 位运算 O(D/64) + 随机选日 O(D)，
+    总代价约 O(T × (log P + D))，T 为总行程数，P 为人数，D 为天数。
+    fixed 的含义同 solve_greedy。
+    """
+    rng = rng or random
+    stats = stats if stats is not None else SolverStats()
+    grid = Availability(people, workdays, day_capacity)
+    if fixed:
+        grid.preload(fixed)
+    slot = {id(p): i for i, p in enumerate(people)}
+    placements = []
+    with stats.phase("solo"):
+        _place_solo(people, grid, slot, placements, stats)
+    with stats.phase("pairing"):
+        placements += _heap_pairing(people, grid, slot, max_partner_tries, rng, stats, control)
+    return placements
+
+
+def _heap_pairing(people, grid, slot, max_partner_tries, rng, stats, control):
+    placements = []
+    total = sum(p.target_count for p in people)
+    done = sum(p.current_count for p in people)
+
+    # 堆元素: (-剩余次数, 随机打破平局, 人员下标)
+    heap = [(-_remaining(p), rng.random(), slot[id(p)]) for p in people if _remaining(p) > 0]
+    heapq.heapify(heap)
+
+    def push(i):
+        r = _remaining(people[i])
+        if r > 0:
+            heapq.heappush(heap, (-r, rng.random(), i))
+
+    while len(heap) >= 2:
+        stats.count("iterations")
+        if control is not None:
+            control.report(done, total)
+            if control.expired():
+                stats.count("deadline_hit")
+                break
+        _, _, i = heapq.heappop(heap)
+        p1 = people[i]
+        skipped = []
+        placed = False
+        while heap and len(skipped) < max_partner_tries:
+            entry = heapq.heappop(heap)
+            j = entry[2]
+            p2 = people[j]
+            if _remaining(p1) >= 2 and _remaining(p2) >= 2:
+                runs = grid.pair_runs(i, j)
+                if runs:
+                    k = rng.choice(list(iter_bits(runs)))
+                    placements.append((grid.days[k], grid.days[k + 1], [p1.name, p2.name]))
+                    p1.current_count += 2; p2.current_count += 2
+                    grid.place([i, j], k, 2)
+                    placed = True
+                else:
+                    stats.count("consecutive_failed")
+            if not placed:
+                days = grid.pair_days(i, j)
+                if days:
+                    k = rng.choice(list(iter_bits(days)))
+                    placements.append((grid.days[k], grid.days[k], [p1.name, p2.name]))
+                    p1.current_count += 1; p2.current_count += 1
+                    grid.place([i, j], k)
+                    placed = True
+                else:
+                    stats.count("single_failed")
+            if placed:
+                start, end, _ = placements[-1]
+                done += 2 * ((end - start).days + 1)
+                push(j)
+                break
+            skipped.append(entry)
+        for entry in skipped:
+            heapq.heappush(heap, entry)
+        if placed:
+            push(i)
+        else:
+            stats.count("dropped")
+
+    return placements
+
+
+# --- 4. 分组模式：每组人数可变 ---
+
+def find_group(grid, anchor, size, candidates, max_nodes=2000):
+    """
+    以 anchor 为首，从 candidates（已按优先顺序排好）中找 size - 1 人凑成一组，
+    要求全组有共同空闲、且当天还能再放一组的日期。返回 (成员下标元组, 共同可用日位图)，找不到返回 None。
+    不枚举全部组合：候选人先与 anchor 的可用日求交，交集为空的直接排除；
+    深度优先逐个加人时再与当前交集按位与，交集为空或剩下的候选人不够凑满就剪枝。
+    max_nodes 限制单次搜索的节点数（大团队时保持每轮代价有界）。
+    """
+    base = grid.group_days([anchor])
+    if not base:
+        return None
+    if size == 1:
+        return (anchor,), base
+    pool = []
+    for j in candidates:
+        m = grid.free(j) & base
+        if m:
+            pool.append((j, m))
+    chosen = [anchor]
+    budget = [max_nodes]
+
+    def dfs(start, mask):
+        need = size - len(chosen)
+        if need == 0:
+            return mask
+        for idx in range(start, len(pool) - need + 1):
+            budget[0] -= 1
+            if budget[0] < 0:
+                return 0
+            j, m = pool[idx]
+            common = mask & m
+            if not common:
+                continue
+            chosen.append(j)
+            found = dfs(idx + 1, common)
+            if found:
+                return found
+            chosen.pop()
+        return 0
+
+    mask = dfs(0, base)
+    return (tuple(chosen), mask) if mask else None
+
+
+def _keeps_partners(people, needy, members, length, min_size):
+    """
+    放下这一组后，剩余最多的人是否仍可能凑齐同行的人：
+    他之后每次出差至少要 min_size - 1 个同行者，其他人的剩余次数之和必须够用。
+    """
+    if min_size <= 1:
+        return True
+    members = set(members)
+    rems = [_remaining(people[i]) - (length if i in members else 0) for i in needy]
+    top = max(rems)
+    return top * (min_size - 1) <= sum(rems) - top
+
+
+def solve_groups(people, workdays, group_sizes=(2,), trips_per_day=2, rng=None, stats=None, control=None,
+                 fixed=None, max_nodes=2000):
+    """
+    分组模式：每组人数取自 group_sizes（如 (2, 3) 表示两人或三人一组，含 1 时允许单人出差），
+    每天最多 trips_per_day 组同时出发，不再要求当天人数成对，也不再为奇数总额单独安排一次单人出差。
+    每天的组数有限，按人数从多到少尝试（优先凑大组，凑不齐再缩小）；
+    大组会同时消耗多人的次数，放下之后剩余最多的人会凑不齐同行者时，改用更小的组或单日行程。
+    每轮取剩余次数最多的人为首，用 find_group 按共同可用日剪枝地找同组的人，
+    全组都还差至少两次且有连续两天的共同空位时优先排连续两天。
+    某人按所有组大小都凑不出组时放弃该人（日期只会越占越满）。fixed 的含义同 solve_greedy。
+    """
+    rng = rng or random
+    stats = stats if stats is not None else SolverStats()
+    grid = GroupAvailability(people, workdays, trips_per_day)
+    if fixed:
+        grid.preload(fixed)
+    sizes = sorted({s for s in group_sizes if s > 0}, reverse=True)
+    total = sum(p.target_count for p in people)
+    dropped = set()
+    placements = []
+
+    with stats.phase("grouping"):
+        while True:
+            stats.count("iterations")
+            if control is not None:
+                control.report(sum(p.current_count for p in people), total)
+                if control.expired():
+                    stats.count("deadline_hit")
+                    break
+            # 剩余次数多的优先，相同时随机打破平局
+            needy = [i for i, p in enumerate(people) if _remaining(p) > 0 and i not in dropped]
+            if not needy:
+                break
+            ties = {i: rng.random() for i in needy}
+            needy.sort(key=lambda i: (-_remaining(people[i]), ties[i]))
+            anchor = needy[0]
+            found = fallback = None
+            for size in sizes:
+                if size > len(needy):
+                    continue
+                group = find_group(grid, anchor, size, needy[1:], max_nodes)
+                if group is None:
+                    stats.count("group_search_failed")
+                elif _keeps_partners(people, needy, group[0], 1, sizes[-1]):
+                    found = group
+                    break
+                else:
+                    stats.count("group_unbalanced")
+                    fallback = fallback or group
+            # 每种组都会让人凑不齐时，仍排下最大的那组（总比不排好）
+            found = found or fallback
+            if found is None:
+                dropped.add(anchor)
+                stats.count("dropped")
+                continue
+            members, mask = found
+            length = 1
+            if all(_remaining(people[i]) >= 2 for i in members):
+                runs = mask & (mask >> 1) & grid.next_day_mask
+                if not runs:
+                    stats.count("consecutive_failed")
+                elif found is fallback or _keeps_partners(people, needy, members, 2, sizes[-1]):
+                    mask, length = runs, 2
+            k = rng.choice(list(iter_bits(mask)))
+            placements.append((grid.days[k], grid.days[k + length - 1], [people[i].name for i in members]))
+            for i in members:
+                people[i].current_count += length
+            grid.place(members, k, length)
+            stats.count(f"group_{len(members)}")
+    return placements
+
+
+SOLVERS = {
+    "exact": solve_exact,
+    "greedy": solve_greedy,
+    "heap": solve_heap,
+}
+
+# 超过这个人数时，精确搜索的组合数太大，直接使用堆驱动的贪心
+LARGE_TEAM = 50
+
+
+def solve(people, workdays, strategy="exact", max_loops=5000, time_budget=2.0, day_capacity=DAY_CAPACITY,
+          seed=None, stats=None, control=None, group_sizes=None, trips_per_day=None):
+    """
+    按指定策略求解。精确求解在预算内找不到完整解时退回随机贪心，保证总能给出一份
+    （可能不完整的）排期；超过 LARGE_TEAM 人时精确求解直接改用堆驱动的贪心。
+    给定 seed 时结果完全可复现。control 用于汇报进度、取消求解和控制总时间预算。
+    给定 group_sizes 时为分组模式，各策略都使用 solve_groups（精确搜索只支持双人模式）。
+    """
+    rng = random.Random(seed) if seed is not None else None
+    if strategy not in SOLVERS:
+        raise ValueError(f"未知的排期策略: {strategy}")
+    if group_sizes is not None:
+        return solve_groups(people, workdays, group_sizes=group_sizes,
+                            trips_per_day=trips_per_day or day_capacity // 2, rng=rng, stats=stats, control=control)
+    if strategy == "exact" and len(people) > LARGE_TEAM:
+        strategy = "heap"
+        if stats is not None:
+            stats.count("exact_routed_heap")
+    if strategy == "greedy":
+        return solve_greedy(people, workdays, max_loops=max_loops, day_capacity=day_capacity, rng=rng, stats=stats,
+                            control=control)
+    if strategy == "heap":
+        return solve_heap(people, workdays, day_capacity=day_capacity, rng=rng, stats=stats, control=control)
+    placements = None
+    # 预检已证明排不满时，不必再做完整搜索
+    if not check_feasibility(people, workdays, day_capacity):
+        placements = solve_exact(people, workdays, time_budget=time_budget, day_capacity=day_capacity, stats=stats,
+                                 control=control, rng=rng)
+    if placements is None:
+        if stats is not None:
+            stats.count("exact_fallback_greedy")
+        placements = solve_greedy(people, workdays, max_loops=max_loops, day_capacity=day_capacity, rng=rng,
+                                  stats=stats, control=control)
+    return placements
@@ -0,0 +1,120 @@
+import datetime
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+import urllib.request
+
+from tripsync.stats import SolverStats
+
+# ==========================================
+# 启动加速（run.py 打包启动器使用）
+# ==========================================
+# 打包后的 exe 冷启动慢，主要花在导入 streamlit / pandas / pyarrow 和第一次建年历上。
+# Streamlit 的页面脚本与启动器在同一个进程里运行，已导入的模块和进程内缓存
+# （节假日表、年历索引）可以直接复用。因此启动器：
+#   1. 在后台线程预先导入页面要用到的重模块、读入节假日表、建好前后几年的年历，
+#      与服务器启动、浏览器加载静态资源同时进行；
+#   2. 轮询 Streamlit 的健康检查接口，服务器真正就绪后才打开浏览器（不再固定等 1 秒）；
+#   3. 每一步都按阶段计时（SolverStats），设置 TRIPSYNC_STARTUP_PROFILE=1 时输出报告，
+#      并追加一行 JSON 到数据目录的 startup.jsonl，便于跟踪启动耗时的回归。
+#
+#   python -m tripsync.startup      # 在新进程里冷启动预热一次并输出各阶段耗时
+
+PROFILE_ENV = "TRIPSYNC_STARTUP_PROFILE"
+
+# 页面首次渲染要用到的重模块，按依赖顺序导入
+WARM_MODULES = ("pandas", "pyarrow", "tripsync.engine", "tripsync.jobs", "tripsync.export")
+
+WARM_UP_JOIN_TIMEOUT = 30.0   # 输出启动报告前最多等预热线程多久（秒）
+
+
+def warm_up(stats, years=None):
+    """预先导入重模块并建好年历索引；任何一步失败都不影响正常启动"""
+    for name in WARM_MODULES:
+        if name in sys.modules:
+            continue
+        with stats.phase(f"import {name}"):
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                stats.count("warm_import_failed")
+    from tripsync.holidays import holiday_table
+    from tripsync.workdays import get_calendar, get_horizon_dates
+    with stats.phase("holiday table"):
+        table = holiday_table()
+    this_year = datetime.date.today().year
+    for year in years or (this_year, this_year + 1):
+        if table.supports(year):
+            with stats.phase("calendar"):
+                get_calendar(year)
+                get_horizon_dates(year, (1, 2, 3, 4))
+
+
+def start_warm_up(stats, years=None):
+    thread = threading.Thread(target=warm_up, args=(stats, years), name="tripsync-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def wait_until_ready(url, timeout=60.0, interval=0.1):
+    """轮询健康检查地址直到返回 200，返回是否就绪"""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as resp:
+                if resp.status == 200:
+                    return True
+        except OSError:
+            pass
+        time.sleep(interval)
+    return False
+
+
+def profiling():
+    return os.environ.get(PROFILE_ENV, "") not in ("", "0")
+
+
+def record(stats, started, warm_thread=None, timeout=WARM_UP_JOIN_TIMEOUT):
+    """
+    输出启动报告并追加到 startup.jsonl（只在 TRIPSYNC_STARTUP_PROFILE 开启时调用）。
+    先等预热线程结束（最多 timeout 秒），报告才完整；超时仍未结束时计入 warm_up_unfinished。
+    """
+    from tripsync.holidays import data_dir
+    if warm_thread is not None:
+        warm_thread.join(timeout)
+        if warm_thread.is_alive():
+            stats.count("warm_up_unfinished")
+    # 其他线程可能仍在写入计时（预热超时、主线程导入 streamlit），只读快照
+    snapshot = SolverStats()
+    snapshot.counters, snapshot.timings = dict(stats.counters), dict(stats.timings)
+    stats = snapshot
+    print(f"\n🩺 启动耗时 (总计 {(time.perf_counter() - started) * 1000:.0f} ms):")
+    print(stats.report())
+    entry = {"time": datetime.datetime.now().isoformat(timespec="seconds"),
+             "frozen": bool(getattr(sys, "frozen", False)), "python": sys.version.split()[0],
+             "timings_ms": {k: round(v * 1000, 1) for k, v in stats.timings.items()},
+             "counters": dict(stats.counters)}
+    try:
+        os.makedirs(data_dir(), exist_ok=True)
+        with open(os.path.join(data_dir(), "startup.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    except OSError:
+        pass
+
+
+def main():
+    started = time.perf_counter()
+    stats = SolverStats()
+    warm_up(stats)
+    with stats.phase("import streamlit"):
+        importlib.import_module("streamlit")
+    print(f"🩺 冷启动预热耗时 {(time.perf_counter() - started) * 1000:.0f} ms")
+    print(stats.report())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+import time
+from contextlib import contextmanager
+
+# ==========================================
+# 求解统计
+# ==========================================
+
+
+class SolverStats:
+    """
+    求解过程的计数器与分阶段计时，供基准测试和诊断使用。
+      stats.count("shuffles")
+      with stats.phase("pairing"):
+          ...
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.timings = {}
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def get(self, name):
+        return self.counters.get(name, 0)
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def merge(self, other):
+        for name, n in other.counters.items():
+            self.count(name, n)
+        for name, seconds in other.timings.items():
+            self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def as_dict(self):
+        return {"counters": dict(self.counters), "timings": dict(self.timings)}
+
+    def report(self):
+        """多行文本报告（命令行 --profile 使用）"""
+        lines = ["⏱️ 阶段耗时:"]
+        for name, seconds in self.timings.items():
+            lines.append(f"   {name:<12} {seconds * 1000:>10.2f} ms")
+        lines.append("🔢 计数器:")
+        for name, n in sorted(self.counters.items()):
+            lines.append(f"   {name:<20} {n:>10}")
+        return "\n".join(lines)
@@ -0,0 +1,156 @@
+import datetime
+from collections import Counter
+
+from tripsync.engine import request_days
+from tripsync.holidays import holiday_table
+from tripsync.workdays import get_quarter_workdays
+
+# ==========================================
+# 排期结果校验
+# ==========================================
+# 独立于求解器，逐条核对一份排期是否满足全部规则：
+#   - 同一个人同一天只出现一次，行程不落在本人的黑名单上
+#   - 每个出差日都是排期区间内的可排日期（去掉季度首尾工作日时，不落在首尾工作日上）
+#   - 审批日 / 报销日正好是出发前 / 返回后的相邻工作日
+#   - 每人实际出差天数与 current_count 一致，且不超过目标
+#   - 每日容量：双人规则下当天人数为偶数且不超过 day_capacity，单人行程当天不能有其他人；
+#     分组模式下每组人数在 group_sizes 内，每天的行程组数不超过 trips_per_day
+# 直接读 EventStore 的列，按日期序数整体展开比较，不逐条创建 TripEvent。
+# 审批日 / 报销日不用 EventStore 生成它们时用的年历偏移表，而是直接查节假日表的逐天工作日标记，
+# 年历索引或节假日表编译有误时也能发现。
+#
+#   problems = verify(request, result)     # 空列表表示全部通过
+
+MAX_EXAMPLES = 3   # 每条规则最多列出的例子数
+
+
+def _day(ordinal):
+    return datetime.date.fromordinal(ordinal).isoformat()
+
+
+def _examples(items):
+    items = list(items)
+    text = "、".join(items[:MAX_EXAMPLES])
+    return text + (f" 等 {len(items)} 处" if len(items) > MAX_EXAMPLES else "")
+
+
+def _adjacent_problem(table, workday, lo, hi):
+    """
+    workday 应是 (lo, hi) 开区间外侧紧邻的工作日：本身是工作日，且与行程之间没有别的工作日。
+    lo / hi 为开区间两端（审批日：(审批日, 出发日)；报销日：(返回日, 报销日)）。返回问题说明或 None。
+    """
+    if not table.supports(datetime.date.fromordinal(workday).year):
+        return "所在年份没有节假日数据"
+    flags, origin = table.flags, table.origin
+    if flags[workday - origin] != 1:
+        return "不是工作日"
+    if hi - lo > 1 and flags.find(1, lo + 1 - origin, hi - origin) >= 0:
+        return "与行程之间还有工作日"
+    return None
+
+
+def verify(request, result):
+    """校验 result（由 request 排出）是否满足全部排期规则，返回问题列表（中文说明）"""
+    store = result.store
+    problems = []
+    names = [p.name for p in request.people]
+    if len(set(names)) != len(names):
+        problems.append("人员姓名有重复，无法按姓名校验")
+        return problems
+    known = set(names)
+    unknown = [name for name in store.names if name not in known]
+    if unknown:
+        problems.append(f"行程中有不在名单里的人：{_examples(unknown)}")
+        return problems
+
+    # --- 展开：每条行程的人员和每个出差日 ---
+    trips = [(s, s + d - 1, [store.names[k] for k in store.group(i)])
+             for i, (s, d) in enumerate(zip(store.start, store.days))]
+    person_day = Counter((name, o) for s, e, members in trips for name in members for o in range(s, e + 1))
+
+    # 1. 同一个人同一天只出现一次
+    dup = sorted(key for key, c in person_day.items() if c > 1)
+    if dup:
+        problems.append("同一人同一天重复出差：" + _examples(f"{name} {_day(o)}" for name, o in dup))
+
+    # 2. 黑名单
+    blackout = {(p.name, d.toordinal()) for p in request.people for d in p.blackout}
+    hit = sorted(key for key in person_day if key in blackout)
+    if hit:
+        problems.append("行程落在黑名单日期上：" + _examples(f"{name} {_day(o)}" for name, o in hit))
+
+    # 3. 出差日必须是可排日期；去掉季度首尾时单独指出落在首尾工作日上的行程
+    allowed = {d.toordinal() for d in request_days(request)}
+    load = Counter(o for _, o in person_day.elements())
+    bad_days = sorted(o for o in load if o not in allowed)
+    if bad_days:
+        edges = set()
+        if request.trim_edges:
+            for q in request.periods:
+                workdays = get_quarter_workdays(request.year, q)
+                if workdays:
+                    edges |= {workdays[0].toordinal(), workdays[-1].toordinal()}
+        on_edges = [o for o in bad_days if o in edges]
+        others = [o for o in bad_days if o not in edges]
+        if on_edges:
+            problems.append("行程落在季度首尾工作日上：" + _examples(_day(o) for o in on_edges))
+        if others:
+            problems.append("行程落在排期区间外或非工作日：" + _examples(_day(o) for o in others))
+
+    # 4. 审批日 / 报销日：对照节假日表逐天的工作日标记
+    table = holiday_table()
+    wrong_approval, wrong_reimburse = [], []
+    for (s, e, _), a, r in zip(trips, store.approval, store.reimburse):
+        why = "不早于出发日" if a >= s else _adjacent_problem(table, a, a, s)
+        if why:
+            wrong_approval.append(f"{_day(s)} 出发 / 审批 {_day(a)}（{why}）")
+        why = "不晚于返回日" if r <= e else _adjacent_problem(table, r, e, r)
+        if why:
+            wrong_reimburse.append(f"{_day(e)} 返回 / 报销 {_day(r)}（{why}）")
+    if wrong_approval:
+        problems.append("审批日不是出发前的上一个工作日：" + _examples(wrong_approval))
+    if wrong_reimburse:
+        problems.append("报销日不是返回后的下一个工作日：" + _examples(wrong_reimburse))
+
+    # 5. 每人次数
+    done = Counter(name for name, _ in person_day.elements())
+    people = {p.name: p for p in result.people}
+    mismatch = [f"{name} 行程 {done[name]} 天 / 记录 {people[name].current_count} 次"
+                for name in names if name in people and people[name].current_count != done[name]]
+    if mismatch:
+        problems.append("出差次数与 current_count 不一致：" + _examples(mismatch))
+    over = [f"{name} {done[name]}/{people[name].target_count}" for name in names
+            if name in people and done[name] > people[name].target_count]
+    if over:
+        problems.append("出差次数超过目标：" + _examples(over))
+
+    # 6. 每日容量
+    trip_load = Counter(o for s, e, _ in trips for o in range(s, e + 1))
+    if request.group_mode:
+        bad_size = [f"{_day(s)} {len(members)} 人" for s, _, members in trips
+                    if len(members) not in request.group_sizes]
+        if bad_size:
+            problems.append("行程人数不在允许的分组人数内：" + _examples(bad_size))
+        over_days = sorted(o for o, c in trip_load.items() if c > request.day_trips)
+        if over_days:
+            problems.append(f"当天行程组数超过 {request.day_trips}：" + _examples(_day(o) for o in over_days))
+        return problems
+
+    solo = [(s, e) for s, e, members in trips if len(members) == 1]
+    solo_days = {o for s, e in solo for o in range(s, e + 1)}
+    max_solo = len(request.periods) if request.split_by_quarter else 1
+    if len(solo) > max_solo:
+        problems.append(f"单人行程有 {len(solo)} 次（最多 {max_solo} 次）")
+    if solo and not request.split_by_quarter and sum(p.total for p in request.people) % 2 == 0:
+        problems.append("总次数为偶数，却安排了单人行程")
+    crowded = sorted(o for o in solo_days if load[o] != 1)
+    if crowded:
+        problems.append("单人出差当天还有其他人：" + _examples(_day(o) for o in crowded))
+    bad_load = sorted((o, c) for o, c in load.items()
+                      if o not in solo_days and (c % 2 == 1 or c > request.day_capacity))
+    if bad_load:
+        problems.append(f"当天出差人数不是偶数或超过 {request.day_capacity} 人：" + _examples(
+            f"{_day(o)} {c} 人" for o, c in bad_load))
+    if any(len(members) > 2 for _, _, members in trips):
+        problems.append("双人规则下出现了三人以上的行程")
+    return problems
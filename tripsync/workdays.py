@@ -0,0 +1,176 @@
+import datetime
+from array import array
+from functools import lru_cache
+
+from tripsync.holidays import holiday_table
+
+# ==========================================
+# 工作日历索引
+# ==========================================
+# 按年份区间一次性算好每天是否为工作日，并预先生成"上一个/下一个工作日"
+# 的偏移表，之后所有工作日查询都是 O(1) 的数组下标访问，
+# 不再逐天调用 chinese_calendar.is_workday。
+# 每天是否为工作日直接从编译好的节假日表（见 holidays.py）中整段切出。
+
+ONE_DAY = datetime.timedelta(days=1)
+
+
+def is_workday(date):
+    """与 chinese_calendar.is_workday 相同，但查的是编译好的表（含本地补充数据）"""
+    return holiday_table().is_workday(date)
+
+
+def _year_supported(year):
+    return holiday_table().supports(year)
+
+
+class WorkdayCalendar:
+    """[start, end] 闭区间内的工作日索引"""
+
+    def __init__(self, start, end, workday_fn=None):
+        self.start = start
+        self.end = end
+        self.origin = start.toordinal()
+        n = end.toordinal() - self.origin + 1
+        self.size = n
+
+        # flags[i]: 第 i 天是否为工作日
+        flags = holiday_table().slice(start, end) if workday_fn is None else None
+        if flags is None:
+            fn = workday_fn or is_workday
+            flags = bytearray(1 if fn(start + datetime.timedelta(days=i)) else 0 for i in range(n))
+        self.flags = flags
+
+        # prev_offset[i] / next_offset[i]: 距离前一个/后一个工作日的天数，0 表示区间内没有
+        self.prev_offset = array('H', bytes(2 * n))
+        self.next_offset = array('H', bytes(2 * n))
+        last = -1
+        for i in range(n):
+            if last >= 0:
+                self.prev_offset[i] = i - last
+            if self.flags[i]:
+                last = i
+        last = -1
+        for i in range(n - 1, -1, -1):
+            if last >= 0:
+                self.next_offset[i] = last - i
+            if self.flags[i]:
+                last = i
+
+    def _index(self, date):
+        i = date.toordinal() - self.origin
+        if 0 <= i < self.size:
+            return i
+        return -1
+
+    def covers(self, date):
+        return self._index(date) >= 0
+
+    def is_workday(self, date):
+        i = self._index(date)
+        if i < 0:
+            return is_workday(date)
+        return bool(self.flags[i])
+
+    def prev_workday(self, date):
+        i = self._index(date)
+        if i >= 0 and self.prev_offset[i]:
+            return date - datetime.timedelta(days=self.prev_offset[i])
+        # 超出索引范围时退回逐天查找（与原实现一致）
+        d = date - ONE_DAY
+        while not self.is_workday(d):
+            d -= ONE_DAY
+        return d
+
+    def next_workday(self, date):
+        i = self._index(date)
+        if i >= 0 and self.next_offset[i]:
+            return date + datetime.timedelta(days=self.next_offset[i])
+        d = date + ONE_DAY
+        while not self.is_workday(d):
+            d += ONE_DAY
+        return d
+
+    def workdays(self, start, end):
+        """返回 [start, end] 内的全部工作日"""
+        lo = max(start.toordinal(), self.origin)
+        hi = min(end.toordinal(), self.origin + self.size - 1)
+        if lo != start.toordinal() or hi != end.toordinal():
+            # 部分超出索引：退回逐天判断
+            days = []
+            curr = start
+            while curr <= end:
+                if self.is_workday(curr):
+                    days.append(curr)
+                curr += ONE_DAY
+            return days
+        flags = self.flags
+        base = self.origin
+        return [datetime.date.fromordinal(base + i)
+                for i in range(lo - base, hi - base + 1) if flags[i]]
+
+
+@lru_cache(maxsize=16)
+def get_calendar(first_year, last_year=None):
+    """
+    获取覆盖 [first_year, last_year] 的工作日索引（按年份区间缓存）。
+    前后各多取一年（如果节假日数据支持），保证跨年的审批/报销日期也能直接查表。
+    """
+    if last_year is None:
+        last_year = first_year
+    lo = first_year - 1 if _year_supported(first_year - 1) else first_year
+    hi = last_year + 1 if _year_supported(last_year + 1) else last_year
+    return WorkdayCalendar(datetime.date(lo, 1, 1), datetime.date(hi, 12, 31))
+
+
+# --- 日期计算工具 ---
+
+def get_prev_workday(date):
+    return get_calendar(date.year).prev_workday(date)
+
+def get_next_workday(date):
+    return get_calendar(date.year).next_workday(date)
+
+def get_quarter_range(year, quarter):
+    start_month = (quarter - 1) * 3 + 1
+    start_date = datetime.date(year, start_month, 1)
+    if quarter == 4:
+        end_date = datetime.date(year + 1, 1, 1) - ONE_DAY
+    else:
+        end_date = datetime.date(year, start_month + 3, 1) - ONE_DAY
+    return start_date, end_date
+
+def get_quarter_workdays(year, quarter):
+    start_date, end_date = get_quarter_range(year, quarter)
+    return get_calendar(year).workdays(start_date, end_date)
+
+def get_schedulable_dates(year, quarter):
+    """季度内可排期的工作日（合规要求：去掉季度首尾两个工作日）"""
+    days = get_quarter_workdays(year, quarter)
+    if len(days) > 2:
+        return days[1:-1]
+    return days
+
+def quarter_of(date):
+    return (date.month - 1) // 3 + 1
+
+def get_horizon_dates(year, quarters, trim_edges=True):
+    """
+    多季度（如全年）排期区间内的工作日，按季度顺序拼接，共用同一份年历索引。
+    trim_edges 时每个季度各自去掉首尾工作日，与单季度排期的合规规则一致。
+    """
+    fn = get_schedulable_dates if trim_edges else get_quarter_workdays
+    days = []
+    for q in sorted(set(quarters)):
+        days.extend(fn(year, q))
+    return days
+
+
+@lru_cache(maxsize=None)
+def check_year_support(year):
+    """
+    检查是否有指定年份的节假日数据（chinese_calendar 库或本地补充文件）。
+    原理：该年至少有一个节假日才算有数据，否则说明国务院还没发通知，或者是库没更新。
+    结果按年份缓存（进程内共享），界面每次重跑不再重新查询整年数据。
+    """
+    return holiday_table().supports(year)